@@ -0,0 +1,186 @@
+import csv
+import os
+import random
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import degrees
+
+# Number of breadth-first searches to run when the graph has more people,
+# and how many searches each worker task runs
+SOURCES = 1000
+BATCH = 16
+SEED = 0
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python analytics.py directory [sources]")
+    directory = sys.argv[1]
+    sources = int(sys.argv[2]) if len(sys.argv) == 3 else SOURCES
+
+    print("Loading data...")
+    degrees.load_data(directory)
+    print("Data loaded.")
+    graph = degrees.graph
+
+    start = time.perf_counter()
+    sizes = component_sizes(graph)
+    print(f"{len(sizes)} connected components, largest has "
+          f"{max(sizes, default=0)} of {graph.people_count} people.")
+
+    people = range(graph.people_count)
+    exact = sources >= graph.people_count
+    if not exact:
+        people = random.Random(SEED).sample(people, sources)
+    separations, eccentricities = search_all(directory, people)
+
+    output = os.path.join(directory, "analytics")
+    os.makedirs(output, exist_ok=True)
+    write_histogram(os.path.join(output, "components.csv"),
+                    ("size", "components"), histogram(sizes))
+    write_histogram(os.path.join(output, "separations.csv"),
+                    ("degrees", "pairs"), enumerate(separations))
+    write_histogram(os.path.join(output, "eccentricities.csv"),
+                    ("eccentricity", "people"),
+                    histogram(eccentricities.values()))
+
+    print_summary(graph, separations, eccentricities, exact)
+    print(f"Histograms written to {output} "
+          f"in {time.perf_counter() - start:.1f} seconds.")
+
+
+def component_sizes(graph):
+    """
+    Returns the number of people in each connected component.
+    """
+    component = array("b", bytes(graph.people_count))
+    sizes = []
+    for person in range(graph.people_count):
+        if not component[person]:
+            reached = search(graph, person, component)
+            sizes.append(sum(reached))
+    return sizes
+
+
+def search(graph, source, visited=None):
+    """
+    Breadth-first search from person index `source`, marking reached people
+    in the `visited` byte array. Each movie is expanded only once, so the
+    search is linear in the size of the graph.
+
+    Returns the number of people first reached at each distance.
+    """
+    if visited is None:
+        visited = array("b", bytes(graph.people_count))
+    expanded = set()
+    visited[source] = 1
+    counts = [1]
+    frontier = [source]
+    while frontier:
+        next_frontier = []
+        for person in frontier:
+            for movie in graph.movies_for(person):
+                if movie in expanded:
+                    continue
+                expanded.add(movie)
+                for star in graph.stars_for(movie):
+                    if not visited[star]:
+                        visited[star] = 1
+                        next_frontier.append(star)
+        if next_frontier:
+            counts.append(len(next_frontier))
+        frontier = next_frontier
+    return counts
+
+
+def search_all(directory, people):
+    """
+    Searches from every person index in `people` across a process pool.
+
+    Returns the histogram of degrees of separation over all (source,
+    person) pairs reached, and a dictionary of each source's eccentricity.
+    """
+    people = list(people)
+    batches = [people[i:i + BATCH] for i in range(0, len(people), BATCH)]
+    separations = []
+    eccentricities = {}
+    with ProcessPoolExecutor(initializer=init_worker,
+                             initargs=(directory,)) as executor:
+        for counts, batch_eccentricities in executor.map(search_batch, batches):
+            for distance, count in enumerate(counts):
+                if distance == len(separations):
+                    separations.append(0)
+                separations[distance] += count
+            eccentricities.update(batch_eccentricities)
+    return separations, eccentricities
+
+
+def init_worker(directory):
+    # Forked workers already share the parent's graph
+    if degrees.graph is None:
+        degrees.load_data(directory)
+
+
+def search_batch(sources):
+    """
+    Returns summed separation counts and the eccentricities of `sources`.
+    """
+    total = []
+    eccentricities = {}
+    for source in sources:
+        counts = search(degrees.graph, source)
+        eccentricities[source] = len(counts) - 1
+        for distance, count in enumerate(counts):
+            if distance == len(total):
+                total.append(0)
+            total[distance] += count
+    return total, eccentricities
+
+
+def histogram(values):
+    """
+    Returns sorted (value, count) pairs for an iterable of values.
+    """
+    counts = {}
+    for value in values:
+        counts[value] = counts.get(value, 0) + 1
+    return sorted(counts.items())
+
+
+def write_histogram(path, header, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def print_summary(graph, separations, eccentricities, exact):
+    """
+    Prints the distribution of degrees of separation between connected
+    pairs and the eccentricity range, scaled up to all pairs when only
+    a sample of sources was searched.
+    """
+    sources = len(eccentricities)
+    pairs = sum(separations[1:])
+    scale = graph.people_count / sources if sources else 0
+    kind = "Exact" if exact else f"Estimated from {sources} sources"
+    print(f"{kind}: {pairs * scale:.0f} connected ordered pairs")
+    for distance, count in enumerate(separations):
+        if distance == 0:
+            continue
+        print(f"  {distance} degrees: {count * scale:.0f} pairs "
+              f"({100 * count / max(pairs, 1):.2f}%)")
+    if pairs:
+        mean = sum(d * c for d, c in enumerate(separations)) / pairs
+        print(f"Mean degrees of separation: {mean:.2f}")
+    if eccentricities:
+        print(f"Eccentricity from {min(eccentricities.values())} "
+              f"to {max(eccentricities.values())}"
+              + ("" if exact else " (maximum is a lower bound on the diameter)"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import random
+import statistics
+import sys
+import time
+
+import degrees
+from util import Node, StackFrontier, QueueFrontier, PriorityFrontier
+
+PAIRS = 100
+SEED = 0
+
+# Frontier sizes for the micro-benchmark, the runs timed at each size,
+# of which the fastest counts, and how much slower per operation the
+# largest may be than the smallest before a warning is printed
+FRONTIER_SIZES = (1000, 10000, 100000)
+FRONTIER_REPEATS = 5
+FRONTIER_SLOWDOWN = 3
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python benchmark.py [directory] [pairs]")
+
+    benchmark_frontiers(FRONTIER_SIZES)
+    if len(sys.argv) == 1:
+        return
+
+    directory = sys.argv[1]
+    count = int(sys.argv[2]) if len(sys.argv) == 3 else PAIRS
+
+    print("Loading data...")
+    degrees.load_data(directory)
+    print("Data loaded.")
+
+    benchmark_search(random_pairs(count, SEED))
+
+
+def benchmark_frontiers(sizes):
+    """
+    Times filling each frontier with n nodes, checking contains_state
+    for every state and emptying it again, for each n in `sizes`, taking
+    the fastest of FRONTIER_REPEATS runs. Prints the cost per operation
+    and the ratio of the largest size's to the smallest's, warning if it
+    is above FRONTIER_SLOWDOWN. Timings are noisy on shared machines, so
+    this is a report rather than a check.
+    """
+    print(f"{'frontier':<18}" + "".join(f"{n:>12}" for n in sizes)
+          + f"{'ratio':>8}  (ns per operation)")
+    for frontier_class in (StackFrontier, QueueFrontier, PriorityFrontier):
+        costs = []
+        for n in sizes:
+            nodes = [Node(state, None, None) for state in range(n)]
+            best = float("inf")
+            for _ in range(FRONTIER_REPEATS):
+                frontier = frontier_class()
+                start = time.perf_counter()
+                for node in nodes:
+                    frontier.add(node)
+                for node in nodes:
+                    frontier.contains_state(node.state)
+                while not frontier.empty():
+                    frontier.remove()
+                best = min(best, time.perf_counter() - start)
+            costs.append(1e9 * best / (3 * n))
+        ratio = costs[-1] / costs[0]
+        print(f"{frontier_class.__name__:<18}"
+              + "".join(f"{cost:>12.1f}" for cost in costs)
+              + f"{ratio:>8.1f}")
+        if ratio > FRONTIER_SLOWDOWN:
+            print(f"Warning: {frontier_class.__name__} may slow down as it "
+                  f"grows.")
+
+
+def random_pairs(count, seed):
+    """
+    Returns `count` (source, target) person id pairs chosen at random.
+    """
+    rng = random.Random(seed)
+    people = degrees.graph.people_count
+    return [
+        (degrees.graph.person_ids[rng.randrange(people)],
+         degrees.graph.person_ids[rng.randrange(people)])
+        for _ in range(count)
+    ]
+
+
+def benchmark_search(pairs):
+    """
+    Runs one-sided and bidirectional search over the same pairs,
+    checks they agree on path lengths and prints how many people
+    each expanded and how long each took.
+    """
+    results = {}
+    for label, bidirectional in (("BFS", False), ("Bidirectional", True)):
+        expanded, seconds, lengths = [], [], []
+        for source, target in pairs:
+            stats = {}
+            start = time.perf_counter()
+            path = degrees.shortest_path(
+                source, target, bidirectional=bidirectional, stats=stats
+            )
+            seconds.append(time.perf_counter() - start)
+            expanded.append(stats["expanded"])
+            lengths.append(None if path is None else len(path))
+        results[label] = (expanded, seconds, lengths)
+
+    mismatches = sum(
+        a != b for a, b in zip(results["BFS"][2], results["Bidirectional"][2])
+    )
+    connected = sum(length is not None for length in results["BFS"][2])
+    print(f"{len(pairs)} random pairs, {connected} connected, "
+          f"{mismatches} path length mismatches")
+    print(f"{'search':<14}{'mean expanded':>15}{'median':>10}"
+          f"{'max':>10}{'mean ms':>10}")
+    for label, (expanded, seconds, _) in results.items():
+        print(f"{label:<14}{statistics.mean(expanded):>15.1f}"
+              f"{statistics.median(expanded):>10.1f}{max(expanded):>10}"
+              f"{1000 * statistics.mean(seconds):>10.2f}")
+    ratio = (sum(results["BFS"][0])
+             / max(sum(results["Bidirectional"][0]), 1))
+    print(f"Bidirectional search expanded {ratio:.1f}x fewer people.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,70 @@
-import csv
+import os
 import sys
+import time
 
+import snapshot
+from loader import load_csv, print_load_stats
+from names import NameIndex
 from util import Node, StackFrontier, QueueFrontier
 
-# Maps names to a set of corresponding person_ids
-names = {}
+# Compact graph of people, movies and stars (see graph.py),
+# people and movies are referred to by integer index inside it
+graph = None
 
-# Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
-people = {}
+# Prefix and fuzzy search over the graph's names (see names.py), built
+# with the data if asked, otherwise the first time a name is not found
+names = None
 
-# Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
-movies = {}
 
+def load_data(directory, stats=None, index_names=False):
+    """
+    Load data into memory, from the directory's snapshot if it is
+    up to date (see snapshot.py), otherwise from its CSV files.
 
+    If `stats` is a list, throughput of each load step is appended to it.
+    If `index_names` is set, the name index is built as well.
+    """
+    global graph, names
+    start = time.perf_counter()
+    names = None
+    graph = snapshot.load(directory)
+    if graph is None:
+        graph = load_csv(directory, stats=stats)
+    elif stats is not None:
+        stats.append({
+            "file": snapshot.FILENAME,
+            "rows": graph.edges_count,
+            "bytes": os.path.getsize(snapshot.snapshot_path(directory)),
+            "seconds": time.perf_counter() - start,
+        })
+    if index_names:
+        name_index()
+    return graph
 
 
-def load_data(directory):
+def print_memory_usage():
     """
-    Load data from CSV files into memory.
+    Prints the size of the loaded graph and its memory cost per edge.
     """
-    # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
+    usage = graph.memory_usage()
+    print(f"{graph.people_count} people, {graph.movies_count} movies, "
+          f"{graph.edges_count} stars.")
+    print(f"Memory: {format_bytes(usage['total'])} total, "
+          f"{format_bytes(usage['edges'])} edges "
+          f"({usage['per_edge']:.1f} bytes/edge), "
+          f"{format_bytes(usage['strings'])} strings, "
+          f"{format_bytes(usage['indexes'])} indexes.")
 
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
 
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+def format_bytes(size):
+    """
+    Formats a byte count with a binary unit suffix.
+    """
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
 
 
 def main():
@@ -62,8 +75,12 @@ def main():
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    start = time.perf_counter()
+    stats = []
+    load_data(directory, stats, index_names=True)
+    print(f"Data loaded in {time.perf_counter() - start:.3f} seconds.")
+    print_load_stats(stats)
+    print_memory_usage()
         
     source = person_id_for_name(input("Source Person: "))#person_id_for_name(input("Name: "))
     if source is None:
@@ -81,64 +98,148 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = graph.person_names[graph.person_index(path[i][1])]
+            person2 = graph.person_names[graph.person_index(path[i + 1][1])]
+            movie = graph.movie_titles[graph.movie_index(path[i + 1][0])]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
         
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False, stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs (action, state)
     that connect the source to the target.
 
+    If `bidirectional` is set, searches from both ends at once.
+    If `stats` is a dictionary, its "expanded" count is increased by
+    the number of people whose neighbors were generated.
+
     If no possible path, returns None.
     """
-    initial_node = Node(source, parent = None, action = None)  
+    source = graph.person_index(source)
+    target = graph.person_index(target)
+    if source is None or target is None:
+        return None
+    if stats is None:
+        stats = {}
+    stats.setdefault("expanded", 0)
+    if bidirectional:
+        return bidirectional_search(source, target, stats)
+
+    initial_node = Node(source, parent = None, action = None)
+    if source == target:
+        return path_for_node(initial_node)
     frontier = QueueFrontier()
     frontier.add(initial_node)
     explored = set()
-    
+
     while not frontier.empty():
-            
+
         current_node = frontier.remove()
         current_state = current_node.state
-          
-        if current_state == target: #Return the solution
-            path = []
-            while current_node.parent is not None:
-                path.insert(0, (current_node.action, current_node.state))
-                current_node = current_node.parent
-            return path  
-        
-        explored.add(current_state)  
-        
-        neighbors = neighbors_for_person(current_state)
-        for neighbor in neighbors: #Make all neighbor information pairs a node and add to frontier 
-            neighbor_state = neighbor[1]
-            if neighbor_state not in explored and not frontier.contains_state(neighbor_state):
-                neighbor_node = Node(neighbor_state, current_node, neighbor[0])
-                if neighbor_state == target: #If neighbor is the target, adds item to first place of frontier, in order to return early
-                    frontier.insert(0, neighbor_node)
-                else:
-                    frontier.add(neighbor_node)
+        explored.add(current_state)
+        stats["expanded"] += 1
+
+        for movie, person in graph.neighbors(current_state): #Make all unseen neighbors a node and add to frontier
+            if person not in explored and not frontier.contains_state(person):
+                neighbor_node = Node(person, current_node, movie)
+                if person == target: #Return as soon as target is generated, one level earlier than when it is removed
+                    return path_for_node(neighbor_node)
+                frontier.add(neighbor_node)
     return None #No Solution
-    
+
+
+def bidirectional_search(source, target, stats):
+    """
+    Breadth-first search from both the source and the target index,
+    expanding one whole level of the smaller frontier at a time
+    until the two searches meet.
+
+    Returns the path in the same format as shortest_path, or None.
+    """
+    # Index 0 searches forward from the source, index 1 backward from the target.
+    # parents maps each reached person to (person it was reached from, movie)
+    parents = ({source: None}, {target: None})
+    depths = ({source: 0}, {target: 0})
+    frontiers = ([source], [target])
+    if source == target:
+        return []
+
+    while frontiers[0] and frontiers[1]:
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        seen, other = parents[side], parents[1 - side]
+        depth, other_depth = depths[side], depths[1 - side]
+
+        # Expand the whole level, keeping the shortest meeting point found
+        meeting, length = None, None
+        next_frontier = []
+        for person in frontiers[side]:
+            stats["expanded"] += 1
+            for movie, neighbor in graph.neighbors(person):
+                if neighbor in seen:
+                    continue
+                seen[neighbor] = (person, movie)
+                depth[neighbor] = depth[person] + 1
+                next_frontier.append(neighbor)
+                if neighbor in other:
+                    total = depth[neighbor] + other_depth[neighbor]
+                    if length is None or total < length:
+                        meeting, length = neighbor, total
+        if meeting is not None:
+            return path_through(meeting, parents)
+        frontiers = (next_frontier, frontiers[1]) if side == 0 else (frontiers[0], next_frontier)
+    return None
+
+
+def path_through(meeting, parents):
+    """
+    Joins the forward and backward search trees of a bidirectional
+    search at person `meeting` into a list of (movie_id, person_id) pairs.
+    """
+    forward, backward = parents
+    path = []
+    person = meeting
+    while forward[person] is not None:
+        previous, movie = forward[person]
+        path.append((graph.movie_ids[movie], graph.person_ids[person]))
+        person = previous
+    path.reverse()
+
+    person = meeting
+    while backward[person] is not None:
+        person, movie = backward[person]
+        path.append((graph.movie_ids[movie], graph.person_ids[person]))
+    return path
+
+
+def path_for_node(node):
+    """
+    Returns the (movie_id, person_id) pairs leading from the
+    search root to `node`, whose states and actions are graph indices.
+    """
+    path = []
+    while node.parent is not None:
+        path.append((graph.movie_ids[node.action], graph.person_ids[node.state]))
+        node = node.parent
+    path.reverse()
+    return path
+
 
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    people = graph.people_named(name)
+    person_ids = [graph.person_ids[person] for person in people]
     if len(person_ids) == 0:
+        print_suggestions(name)
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
-        for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
+        for person in people:
+            person_id = graph.person_ids[person]
+            name = graph.person_names[person]
+            birth = graph.person_births[person]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
         try:
             person_id = input("Intended Person ID: ")
@@ -151,16 +252,42 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def name_index():
+    """
+    Returns the name index of the loaded graph, building it if needed.
+    """
+    global names
+    if names is None:
+        start = time.perf_counter()
+        names = NameIndex(graph)
+        print(f"Name index built in {time.perf_counter() - start:.1f} seconds, "
+              f"using {format_bytes(names.memory_usage())}.")
+    return names
+
+
+def print_suggestions(name, limit=5):
+    """
+    Prints the names most like `name`, best first.
+    """
+    index = name_index()
+    results = index.search(name, limit)
+    if results:
+        print("Did you mean:")
+        for score, k in results:
+            for person in index.people(k):
+                print(f"  {graph.person_names[person]} "
+                      f"(ID: {graph.person_ids[person]}, "
+                      f"Birth: {graph.person_births[person]})")
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
     neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
+    for movie, person in graph.neighbors(graph.person_index(person_id)):
+        neighbors.add((graph.movie_ids[movie], graph.person_ids[person]))
     return neighbors
 
 
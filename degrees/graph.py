@@ -0,0 +1,296 @@
+import bisect
+from array import array
+
+
+# Typecodes for the packed arrays: 32-bit node indices, 64-bit offsets
+INDEX = "i"
+OFFSET = "q"
+
+
+def nbytes(buffer):
+    """
+    Returns the size in bytes of an array, bytes or memoryview buffer.
+    """
+    return memoryview(buffer).nbytes
+
+
+class StringTable():
+    """
+    Immutable sequence of strings packed into a single UTF-8 buffer,
+    with string `i` stored at data[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def nbytes(self):
+        return nbytes(self.data) + nbytes(self.offsets)
+
+
+class StringTableBuilder():
+    """
+    Appends strings to a growing buffer, then freezes into a StringTable.
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array(OFFSET, [0])
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def append(self, s):
+        self.data += s.encode("utf-8")
+        self.offsets.append(len(self.data))
+
+    def build(self):
+        return StringTable(bytes(self.data), self.offsets)
+
+
+def csr(n, rows, cols):
+    """
+    Returns (offsets, targets) arrays of a compressed sparse row adjacency
+    with `n` rows built from parallel `rows` and `cols` edge arrays.
+    Each row's targets are sorted and duplicate edges are dropped.
+    """
+    counts = array(OFFSET, bytes(8 * (n + 1)))
+    for row in rows:
+        counts[row + 1] += 1
+    for i in range(n):
+        counts[i + 1] += counts[i]
+
+    # Scatter edges into their rows
+    targets = array(INDEX, bytes(4 * len(cols)))
+    position = array(OFFSET, counts)
+    for row, col in zip(rows, cols):
+        targets[position[row]] = col
+        position[row] += 1
+
+    # Sort and deduplicate each row in place, compacting as we go
+    offsets = array(OFFSET, [0])
+    end = 0
+    for i in range(n):
+        row = sorted(set(targets[counts[i]:counts[i + 1]]))
+        targets[end:end + len(row)] = array(INDEX, row)
+        end += len(row)
+        offsets.append(end)
+    del targets[end:]
+
+    return offsets, targets
+
+
+class StarGraph():
+    """
+    Bipartite graph of people and the movies they starred in.
+
+    People and movies are interned to dense integer indices. Edges are
+    stored twice as CSR arrays: person -> movies and movie -> stars, so
+    neighbors of a person are found without building any Python objects.
+    Names, titles and IMDb ids live in packed string tables, and ids and
+    names are looked up by binary search over sorted index permutations.
+    """
+
+    # Every buffer making up a graph, in a fixed order
+    FIELDS = (
+        "person_ids", "person_names", "person_births",
+        "movie_ids", "movie_titles", "movie_years",
+        "person_offsets", "person_movies",
+        "movie_offsets", "movie_stars",
+        "person_by_id", "movie_by_id", "person_by_name",
+    )
+
+    def __init__(self, **fields):
+        for field in StarGraph.FIELDS:
+            setattr(self, field, fields[field])
+
+    @property
+    def people_count(self):
+        return len(self.person_ids)
+
+    @property
+    def movies_count(self):
+        return len(self.movie_ids)
+
+    @property
+    def edges_count(self):
+        return len(self.person_movies)
+
+    def person_index(self, person_id):
+        """
+        Returns the index of the person with IMDb id `person_id`, or None.
+        """
+        return self._find(self.person_by_id, self.person_ids, person_id)
+
+    def movie_index(self, movie_id):
+        """
+        Returns the index of the movie with IMDb id `movie_id`, or None.
+        """
+        return self._find(self.movie_by_id, self.movie_ids, movie_id)
+
+    def people_named(self, name):
+        """
+        Returns the indices of all people whose lowercase name is `name`.
+        """
+        name = name.lower()
+        key = lambda i: self.person_names[i].lower()
+        start = bisect.bisect_left(self.person_by_name, name, key=key)
+        end = bisect.bisect_right(self.person_by_name, name, key=key)
+        return list(self.person_by_name[start:end])
+
+    def movies_for(self, person):
+        """
+        Returns the indices of the movies a person starred in.
+        """
+        return self.person_movies[
+            self.person_offsets[person]:self.person_offsets[person + 1]
+        ]
+
+    def stars_for(self, movie):
+        """
+        Returns the indices of the people who starred in a movie.
+        """
+        return self.movie_stars[
+            self.movie_offsets[movie]:self.movie_offsets[movie + 1]
+        ]
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people who starred
+        with a given person, including the person themselves.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+        for k in range(person_offsets[person], person_offsets[person + 1]):
+            movie = person_movies[k]
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_stars[j]
+
+    def memory_usage(self):
+        """
+        Returns a dictionary of bytes used by the edge arrays ("edges"),
+        the string tables ("strings") and the lookup permutations
+        ("indexes"), along with their "total" and "per_edge" cost.
+        """
+        usage = {
+            "edges": sum(nbytes(getattr(self, field)) for field in (
+                "person_offsets", "person_movies",
+                "movie_offsets", "movie_stars",
+            )),
+            "strings": sum(getattr(self, field).nbytes() for field in (
+                "person_ids", "person_names", "person_births",
+                "movie_ids", "movie_titles", "movie_years",
+            )),
+            "indexes": sum(nbytes(getattr(self, field)) for field in (
+                "person_by_id", "movie_by_id", "person_by_name",
+            )),
+        }
+        usage["total"] = sum(usage.values())
+        usage["per_edge"] = usage["edges"] / max(self.edges_count, 1)
+        return usage
+
+    @staticmethod
+    def _find(permutation, table, key):
+        i = bisect.bisect_left(permutation, key, key=lambda j: table[j])
+        if i < len(permutation) and table[permutation[i]] == key:
+            return permutation[i]
+        return None
+
+
+class GraphBuilder():
+    """
+    Incrementally collects people, movies and stars, then packs
+    them into a StarGraph.
+    """
+
+    def __init__(self):
+        self.person_ids = StringTableBuilder()
+        self.person_names = StringTableBuilder()
+        self.person_births = StringTableBuilder()
+        self.movie_ids = StringTableBuilder()
+        self.movie_titles = StringTableBuilder()
+        self.movie_years = StringTableBuilder()
+
+        # Interning tables, only needed while loading
+        self.person_index = {}
+        self.movie_index = {}
+
+        # Star edges as parallel arrays of person and movie indices
+        self.star_people = array(INDEX)
+        self.star_movies = array(INDEX)
+
+    def add_person(self, person_id, name, birth):
+        if person_id in self.person_index:
+            return
+        self.person_index[person_id] = len(self.person_ids)
+        self.person_ids.append(person_id)
+        self.person_names.append(name)
+        self.person_births.append(birth)
+
+    def add_movie(self, movie_id, title, year):
+        if movie_id in self.movie_index:
+            return
+        self.movie_index[movie_id] = len(self.movie_ids)
+        self.movie_ids.append(movie_id)
+        self.movie_titles.append(title)
+        self.movie_years.append(year)
+
+    def add_star(self, person_id, movie_id):
+        """
+        Records that a person starred in a movie, ignoring unknown ids.
+        """
+        person = self.person_index.get(person_id)
+        movie = self.movie_index.get(movie_id)
+        if person is None or movie is None:
+            return
+        self.star_people.append(person)
+        self.star_movies.append(movie)
+
+    def build(self):
+        person_ids = self.person_ids.build()
+        person_names = self.person_names.build()
+        movie_ids = self.movie_ids.build()
+        people_count = len(person_ids)
+        movies_count = len(movie_ids)
+
+        person_offsets, person_movies = csr(
+            people_count, self.star_people, self.star_movies
+        )
+        movie_offsets, movie_stars = csr(
+            movies_count, self.star_movies, self.star_people
+        )
+        self.star_people = self.star_movies = None
+
+        person_by_id = array(INDEX, sorted(
+            range(people_count), key=lambda i: person_ids[i]
+        ))
+        movie_by_id = array(INDEX, sorted(
+            range(movies_count), key=lambda i: movie_ids[i]
+        ))
+        person_by_name = array(INDEX, sorted(
+            range(people_count), key=lambda i: person_names[i].lower()
+        ))
+
+        return StarGraph(
+            person_ids=person_ids,
+            person_names=person_names,
+            person_births=self.person_births.build(),
+            movie_ids=movie_ids,
+            movie_titles=self.movie_titles.build(),
+            movie_years=self.movie_years.build(),
+            person_offsets=person_offsets,
+            person_movies=person_movies,
+            movie_offsets=movie_offsets,
+            movie_stars=movie_stars,
+            person_by_id=person_by_id,
+            movie_by_id=movie_by_id,
+            person_by_name=person_by_name,
+        )
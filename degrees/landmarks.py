@@ -0,0 +1,288 @@
+import os
+import pickle
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+
+import degrees
+import snapshot
+
+LANDMARKS = 16
+CACHE_SIZE = 10000
+FILENAME = "landmarks.index"
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python landmarks.py directory [landmarks]")
+    directory = sys.argv[1]
+    count = int(sys.argv[2]) if len(sys.argv) == 3 else LANDMARKS
+
+    print("Loading data...")
+    degrees.load_data(directory)
+    print("Data loaded.")
+
+    index = LandmarkIndex(degrees.graph, choose_landmarks(degrees.graph, count))
+    path = index_path(directory)
+    index.save(path)
+    for landmark in index.landmarks:
+        name = degrees.graph.person_names[landmark]
+        reached = sum(distance >= 0 for distance in index.distances[landmark])
+        print(f"  {name}: reaches {reached} people")
+    print(f"Landmark index written to {path}.")
+
+
+def index_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def choose_landmarks(graph, count):
+    """
+    Returns the indices of the `count` people who starred in the most
+    movies, as hubs make good landmarks.
+    """
+    return sorted(
+        range(graph.people_count),
+        key=lambda person: len(graph.movies_for(person)),
+        reverse=True
+    )[:count]
+
+
+class LandmarkIndex():
+    """
+    Breadth-first search trees rooted at a few landmark people.
+
+    For every landmark, `distances` holds each person's degrees of
+    separation from it (-1 if unreachable) and `parents` and `movies`
+    the next person and shared movie on a shortest path back to it.
+    """
+
+    def __init__(self, graph, landmarks):
+        self.graph = graph
+        self.landmarks = list(landmarks)
+        self.distances = {}
+        self.parents = {}
+        self.movies = {}
+        for landmark in self.landmarks:
+            self.search(landmark)
+
+    def search(self, landmark):
+        """
+        Builds the search tree rooted at `landmark`.
+        """
+        n = self.graph.people_count
+        distances = array("i", [-1]) * n
+        parents = array("i", [-1]) * n
+        movies = array("i", [-1]) * n
+        distances[landmark] = 0
+
+        frontier = [landmark]
+        while frontier:
+            next_frontier = []
+            for person in frontier:
+                for movie, neighbor in self.graph.neighbors(person):
+                    if distances[neighbor] < 0:
+                        distances[neighbor] = distances[person] + 1
+                        parents[neighbor] = person
+                        movies[neighbor] = movie
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+
+        self.distances[landmark] = distances
+        self.parents[landmark] = parents
+        self.movies[landmark] = movies
+
+    def save(self, path):
+        """
+        Writes the index to `path`, stamped with the CSV files in the same
+        directory, which the graph is taken to be loaded from.
+        """
+        with open(path, "wb") as f:
+            pickle.dump({
+                "sources": snapshot.source_stamps(os.path.dirname(path)),
+                "people": self.graph.people_count,
+                "edges": self.graph.edges_count,
+                "landmarks": self.landmarks,
+                "distances": self.distances,
+                "parents": self.parents,
+                "movies": self.movies,
+            }, f)
+
+    @classmethod
+    def load(cls, graph, path):
+        """
+        Returns the index saved at `path` for `graph`, or None if there is
+        none, or it was built from different CSV files than those next to
+        it or for a graph of another size.
+        """
+        try:
+            with open(path, "rb") as f:
+                saved = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        sources = snapshot.source_stamps(os.path.dirname(path))
+        if (saved.get("sources") != sources
+                or saved["people"] != graph.people_count
+                or saved["edges"] != graph.edges_count):
+            return None
+        index = cls.__new__(cls)
+        index.graph = graph
+        for field in ("landmarks", "distances", "parents", "movies"):
+            setattr(index, field, saved[field])
+        return index
+
+    def path_to(self, landmark, person):
+        """
+        Returns the shortest path from `person` to `landmark`
+        as (movie, person) index pairs, or None if not connected.
+        """
+        if self.distances[landmark][person] < 0:
+            return None
+        parents, movies = self.parents[landmark], self.movies[landmark]
+        path = []
+        while person != landmark:
+            path.append((movies[person], parents[person]))
+            person = parents[person]
+        return path
+
+    def path(self, source, target):
+        """
+        Returns the shortest path between two person indices, one of which
+        must be a landmark, as (movie, person) index pairs, or None.
+        """
+        if target in self.distances:
+            return self.path_to(target, source)
+
+        # Walk back from the target to the landmark, then reverse the walk
+        steps = self.path_to(source, target)
+        if steps is None:
+            return None
+        people = [target] + [person for _, person in steps]
+        return [
+            (movie, person)
+            for (movie, _), person in zip(reversed(steps), reversed(people[:-1]))
+        ]
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper, landmark) bounds on the degrees of separation
+        between two person indices, where `upper` is reached by a path
+        through `landmark`. Returns None if a landmark proves the two
+        people are not connected, and (0, None, None) if nothing is known.
+        """
+        lower, upper, via = 0, None, None
+        for landmark in self.landmarks:
+            distances = self.distances[landmark]
+            a, b = distances[source], distances[target]
+            if (a < 0) != (b < 0):
+                return None
+            if a < 0:
+                continue
+            lower = max(lower, abs(a - b))
+            if upper is None or a + b < upper:
+                upper, via = a + b, landmark
+        return lower, upper, via
+
+
+class PathCache():
+    """
+    Least recently used cache of query results keyed on (source, target),
+    counting hits, misses and evictions. Safe to share between threads.
+    """
+
+    def __init__(self, capacity=CACHE_SIZE):
+        self.lock = threading.Lock()
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Returns (True, result) for a cached key, (False, None) otherwise.
+        """
+        with self.lock:
+            try:
+                result = self.entries[key]
+            except KeyError:
+                self.misses += 1
+                return False, None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, result
+
+    def put(self, key, result):
+        with self.lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def shortest_path(source, target, index=None, cache=None, stats=None):
+    """
+    Returns the same shortest path as degrees.shortest_path, using
+    `cache` for repeated queries and the landmark `index` to answer
+    queries from or to a landmark, queries that the landmark distance
+    bounds settle, and queries between unconnected people, without search.
+    """
+    if cache is not None:
+        found, path = cache.get((source, target))
+        if found:
+            return path
+    path = find_path(source, target, index, stats)
+    if cache is not None:
+        cache.put((source, target), path)
+    return path
+
+
+def find_path(source, target, index, stats):
+    graph = degrees.graph
+    if index is not None:
+        source_index = graph.person_index(source)
+        target_index = graph.person_index(target)
+        if source_index is None or target_index is None:
+            return None
+        if source_index in index.distances or target_index in index.distances:
+            return to_ids(index.path(source_index, target_index))
+
+        bounds = index.bounds(source_index, target_index)
+        if bounds is None:
+            return None
+        lower, upper, via = bounds
+        if upper is not None and lower == upper:
+            return (to_ids(index.path(source_index, via))
+                    + to_ids(index.path(via, target_index)))
+
+    return degrees.shortest_path(source, target, bidirectional=True, stats=stats)
+
+
+def to_ids(path):
+    """
+    Converts (movie, person) index pairs to (movie_id, person_id) pairs.
+    """
+    if path is None:
+        return None
+    graph = degrees.graph
+    return [
+        (graph.movie_ids[movie], graph.person_ids[person])
+        for movie, person in path
+    ]
+
+
+if __name__ == "__main__":
+    main()
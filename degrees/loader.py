@@ -0,0 +1,150 @@
+import csv
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from graph import GraphBuilder
+
+# CSV files making up a dataset directory, in the order they are loaded
+FILES = ("people.csv", "movies.csv", "stars.csv")
+
+# Columns read from each file, in the order GraphBuilder expects them
+COLUMNS = {
+    "people.csv": ("id", "name", "birth"),
+    "movies.csv": ("id", "title", "year"),
+    "stars.csv": ("person_id", "movie_id"),
+}
+
+# Bytes parsed per task, and how many tasks per worker may be in flight,
+# which together bound the memory held by parsed rows
+CHUNK_SIZE = 8 * 2 ** 20
+CHUNKS_PER_WORKER = 2
+
+
+def load_csv(directory, workers=None, stats=None):
+    """
+    Load data from CSV files into a StarGraph.
+
+    Each file is split into chunks of about CHUNK_SIZE bytes that are
+    parsed on a pool of `workers` processes (one per CPU by default) and
+    added to the graph in file order as they arrive. Files smaller than
+    one chunk are parsed in this process.
+
+    If `stats` is a list, a dictionary of "file", "rows", "bytes" and
+    "seconds" is appended to it for each file.
+    """
+    builder = GraphBuilder()
+    add = {
+        "people.csv": builder.add_person,
+        "movies.csv": builder.add_movie,
+        "stars.csv": builder.add_star,
+    }
+    workers = workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(workers) as executor:
+        for filename in FILES:
+            path = os.path.join(directory, filename)
+            start = time.perf_counter()
+            rows = 0
+            for chunk in read_chunks(path, COLUMNS[filename], executor, workers):
+                for row in chunk:
+                    add[filename](*row)
+                rows += len(chunk)
+            if stats is not None:
+                stats.append({
+                    "file": filename,
+                    "rows": rows,
+                    "bytes": os.path.getsize(path),
+                    "seconds": time.perf_counter() - start,
+                })
+
+    start = time.perf_counter()
+    graph = builder.build()
+    if stats is not None:
+        stats.append({
+            "file": "graph",
+            "rows": graph.edges_count,
+            "bytes": 0,
+            "seconds": time.perf_counter() - start,
+        })
+    return graph
+
+
+def read_chunks(path, columns, executor, workers):
+    """
+    Yields lists of rows of the CSV file at `path`, each row a tuple of
+    the named `columns`, in file order. An empty file has no rows.
+
+    Raises ValueError if the header lacks one of the columns.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        header = next(csv.reader([f.readline()]), None)
+    if not header:
+        return
+    for column in columns:
+        if column not in header:
+            raise ValueError(f"{path} has no {column} column")
+    indices = [header.index(column) for column in columns]
+    ranges = chunk_ranges(path, CHUNK_SIZE)
+
+    if len(ranges) == 1:
+        yield parse_chunk(path, *ranges[0], indices)
+        return
+
+    # Keep a bounded window of chunks in flight, yielding them in order
+    pending = []
+    for start, end in ranges:
+        pending.append(executor.submit(parse_chunk, path, start, end, indices))
+        if len(pending) >= CHUNKS_PER_WORKER * workers:
+            yield pending.pop(0).result()
+    for future in pending:
+        yield future.result()
+
+
+def chunk_ranges(path, size):
+    """
+    Returns (start, end) byte ranges covering the rows of the CSV file at
+    `path` after its header, each about `size` bytes and ending at a line
+    break. Assumes no quoted field spans lines, as in the IMDb exports.
+    """
+    ranges = []
+    with open(path, "rb") as f:
+        f.readline()
+        start = f.tell()
+        total = os.path.getsize(path)
+        while start < total:
+            f.seek(min(start + size, total))
+            f.readline()
+            end = min(f.tell(), total)
+            ranges.append((start, end))
+            start = end
+    return ranges or [(0, 0)]
+
+
+def parse_chunk(path, start, end, indices):
+    """
+    Returns the rows in bytes [start, end) of the CSV file at `path`
+    as tuples of the columns at `indices`, skipping short rows.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    reader = csv.reader(io.StringIO(data.decode("utf-8"), newline=""))
+    width = max(indices) + 1
+    return [
+        tuple(row[i] for i in indices)
+        for row in reader
+        if len(row) >= width
+    ]
+
+
+def print_load_stats(stats):
+    """
+    Prints rows and megabytes per second for each step of a load.
+    """
+    for step in stats:
+        seconds = max(step["seconds"], 1e-9)
+        print(f"  {step['file']}: {step['rows']} rows in {seconds:.3f} seconds "
+              f"({step['rows'] / seconds:.0f} rows/sec, "
+              f"{step['bytes'] / 2 ** 20 / seconds:.1f} MB/sec)")
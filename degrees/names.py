@@ -0,0 +1,244 @@
+import bisect
+from array import array
+
+from graph import INDEX, OFFSET, StringTableBuilder, nbytes
+
+LIMIT = 10
+
+# Deletion keys pack HASH_BITS of a string's hash above WORD_BITS of the
+# number of the word it was derived from, in one 64-bit integer
+WORD_BITS = 24
+HASH_BITS = 39
+
+
+def deletions(word):
+    """
+    Returns the set of strings made by deleting one letter from `word`,
+    along with `word` itself.
+    """
+    return {word} | {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def edits(a, b):
+    """
+    Returns the Levenshtein distance between two strings if it is 0 or 1,
+    otherwise 2.
+    """
+    if a == b:
+        return 0
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) - len(a) > 1:
+        return 2
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return 1 if a[i + 1:] == b[i + 1:] else 2
+    return 1 if a[i:] == b[i + 1:] else 2
+
+
+def invert(lists, n):
+    """
+    Returns CSR (offsets, postings) arrays listing, for each of `n` keys,
+    the positions in `lists` whose list contains the key.
+    """
+    counts = array(OFFSET, bytes(8 * (n + 1)))
+    for keys in lists:
+        for key in keys:
+            counts[key + 1] += 1
+    for i in range(n):
+        counts[i + 1] += counts[i]
+    postings = array(INDEX, bytes(4 * counts[n]))
+    position = array(OFFSET, counts)
+    for i, keys in enumerate(lists):
+        for key in keys:
+            postings[position[key]] = i
+            position[key] += 1
+    return counts, postings
+
+
+def posting(offsets, postings, i):
+    """
+    Returns row `i` of a CSR array pair without copying it.
+    """
+    return memoryview(postings)[offsets[i]:offsets[i + 1]]
+
+
+class NameIndex():
+    """
+    Prefix and typo-tolerant search over the people of a StarGraph.
+
+    Distinct lowercase names are numbered in sorted order, name `k`
+    covering graph.person_by_name[starts[k]:starts[k + 1]], so a prefix
+    is a range found by binary search.
+
+    For fuzzy search names are split into words. Each name maps to its
+    words and each word to the names containing it, as CSR arrays. Typos
+    are found with a deletion index: every word is stored under itself
+    and each string made by deleting one of its letters, so two words
+    within one edit of each other always share a key. Keys are hashed
+    into a sorted array, found by binary search and then verified.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        people = graph.person_by_name
+
+        # Group people sharing a lowercase name
+        names = StringTableBuilder()
+        self.starts = array(OFFSET)
+        previous = None
+        for i in range(len(people)):
+            name = graph.person_names[people[i]].lower()
+            if name != previous:
+                names.append(name)
+                self.starts.append(i)
+                previous = name
+        self.starts.append(len(people))
+        self.names = names.build()
+
+        # Number distinct words in sorted order
+        words = set()
+        for k in range(len(self.names)):
+            words.update(self.names[k].split())
+        words = sorted(words)
+        if len(words) >= 2 ** WORD_BITS:
+            raise ValueError("too many distinct words to index")
+        numbers = {word: i for i, word in enumerate(words)}
+        table = StringTableBuilder()
+        for word in words:
+            table.append(word)
+        self.words = table.build()
+
+        # Name -> words, and its inverse word -> names
+        name_words = [
+            sorted({numbers[word] for word in self.names[k].split()})
+            for k in range(len(self.names))
+        ]
+        self.name_offsets = array(OFFSET, [0])
+        self.name_words = array(INDEX)
+        for word_numbers in name_words:
+            self.name_words.extend(word_numbers)
+            self.name_offsets.append(len(self.name_words))
+        self.word_offsets, self.word_names = invert(name_words, len(words))
+        del name_words, numbers
+
+        # Deletion keys of every word
+        self.keys = array("q", sorted(
+            key_for(deletion) | i
+            for i, word in enumerate(words)
+            for deletion in deletions(word)
+        ))
+
+    def people(self, k):
+        """
+        Returns the person indices having name number `k`.
+        """
+        return list(self.graph.person_by_name[self.starts[k]:self.starts[k + 1]])
+
+    def prefix(self, prefix, limit=LIMIT):
+        """
+        Returns up to `limit` name numbers starting with `prefix`, shortest first.
+        """
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self.names, prefix)
+        end = bisect.bisect_left(self.names, prefix + "\U0010ffff", lo=start)
+        if end - start > limit:
+
+            # Too many to sort by length, keep them in alphabetical order
+            return list(range(start, start + limit))
+        return sorted(range(start, end), key=lambda k: len(self.names[k]))
+
+    def similar_words(self, word):
+        """
+        Returns a dictionary mapping the numbers of words within one edit
+        of `word` to a similarity score, 1 for the word itself.
+        """
+        similar = {}
+        for deletion in deletions(word):
+            key = key_for(deletion)
+            start = bisect.bisect_left(self.keys, key)
+            end = bisect.bisect_left(self.keys, key + 2 ** WORD_BITS, lo=start)
+            for j in range(start, end):
+                i = self.keys[j] & (2 ** WORD_BITS - 1)
+                if i in similar:
+                    continue
+                distance = edits(word, self.words[i])
+                if distance <= 1:
+                    similar[i] = 1 - distance / max(len(word), 2)
+        return similar
+
+    def fuzzy(self, name, limit=LIMIT):
+        """
+        Returns up to `limit` (score, name number) pairs for the names with
+        a word within one edit of every word of `name`, in any order, best
+        first. A name scores the mean similarity of its best match for each
+        query word, averaged over its own word count if it has more words.
+        """
+        query = set(name.lower().split())
+        if not query:
+            return []
+        matches = [self.similar_words(word) for word in query]
+        if not all(matches):
+            return []
+
+        # Draw candidates from the query word matching the fewest names,
+        # then check their other words through the name -> words arrays
+        offsets = self.word_offsets
+        matches.sort(key=lambda similar: sum(
+            offsets[i + 1] - offsets[i] for i in similar
+        ))
+        candidates = set()
+        for i in matches[0]:
+            candidates.update(posting(offsets, self.word_names, i))
+
+        scores = []
+        for k in candidates:
+            words = posting(self.name_offsets, self.name_words, k)
+            total = 0
+            for similar in matches:
+                best = max(similar.get(i, 0) for i in words)
+                if not best:
+                    break
+                total += best
+            else:
+                scores.append((total / max(len(query), len(words)), k))
+        scores.sort(key=lambda pair: (-pair[0], len(self.names[pair[1]])))
+        return scores[:limit]
+
+    def search(self, name, limit=LIMIT):
+        """
+        Returns up to `limit` (score, name number) pairs ranked exact match
+        first, then names starting with `name`, then similar names.
+        """
+        results = []
+        seen = set()
+        for k in self.prefix(name, limit):
+            score = 1.0 if self.names[k] == name.lower() else 0.99
+            results.append((score, k))
+            seen.add(k)
+        if len(results) < limit:
+            for score, k in self.fuzzy(name, limit):
+                if k not in seen:
+                    results.append((min(score, 0.98), k))
+        results.sort(key=lambda pair: -pair[0])
+        return results[:limit]
+
+    def memory_usage(self):
+        """
+        Returns the bytes used by the index, not counting the graph.
+        """
+        return self.names.nbytes() + self.words.nbytes() + sum(
+            nbytes(buffer) for buffer in (
+                self.starts, self.name_offsets, self.name_words,
+                self.word_offsets, self.word_names, self.keys,
+            )
+        )
+
+
+def key_for(deletion):
+    """
+    Returns the deletion key prefix for a string, with the word bits clear.
+    """
+    return (hash(deletion) & (2 ** HASH_BITS - 1)) << WORD_BITS
@@ -0,0 +1,235 @@
+import json
+import math
+import os
+import socketserver
+import statistics
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import degrees
+import landmarks
+
+WORKERS = 8
+
+# Queries per worker that may be in flight at once, which bounds the
+# memory held by queued queries and results waiting to be written
+QUERIES_PER_WORKER = 4
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python server.py directory [socket]")
+    directory = sys.argv[1]
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(directory)
+    print("Data loaded.", file=sys.stderr)
+
+    # Use the landmark index built by landmarks.py, if there is one
+    index = landmarks.LandmarkIndex.load(
+        degrees.graph, landmarks.index_path(directory)
+    )
+    if index is not None:
+        print(f"Using {len(index.landmarks)} landmarks.", file=sys.stderr)
+
+    stats = QueryStats(index, landmarks.PathCache())
+    with ThreadPoolExecutor(WORKERS) as executor:
+        if len(sys.argv) == 2:
+            serve(sys.stdin, Output(sys.stdout), executor, stats)
+        else:
+            serve_socket(sys.argv[2], executor, stats)
+    print(json.dumps(stats.summary()), file=sys.stderr)
+
+
+class QueryStats():
+    """
+    Thread-safe record of query latencies, for throughput reports,
+    along with the landmark index and result cache queries share.
+    """
+
+    def __init__(self, index=None, cache=None):
+        self.index = index
+        self.cache = cache
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.start = time.perf_counter()
+
+    def record(self, seconds):
+        with self.lock:
+            self.latencies.append(seconds)
+
+    def summary(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+        elapsed = time.perf_counter() - self.start
+        summary = {
+            "queries": len(latencies),
+            "seconds": elapsed,
+            "queries_per_second": len(latencies) / elapsed,
+        }
+        if latencies:
+            summary.update({
+                "mean_ms": 1000 * statistics.mean(latencies),
+                "p50_ms": 1000 * percentile(latencies, 0.5),
+                "p95_ms": 1000 * percentile(latencies, 0.95),
+                "max_ms": 1000 * latencies[-1],
+            })
+        if self.cache is not None:
+            summary["cache"] = self.cache.stats()
+        return summary
+
+
+def percentile(values, q):
+    """
+    Returns the nearest-rank `q` percentile, as a fraction, of a sorted
+    list of values, or None if it is empty.
+    """
+    if not values:
+        return None
+    rank = math.ceil(q * len(values))
+    return values[min(len(values), max(rank, 1)) - 1]
+
+
+class Output():
+    """
+    Writes JSON lines to a text stream, one whole line at a time.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.lock = threading.Lock()
+
+    def write(self, result):
+        line = json.dumps(result) + "\n"
+        with self.lock:
+            self.stream.write(line)
+            self.stream.flush()
+
+
+def serve(lines, output, executor, stats):
+    """
+    Answers one query per line of `lines`, running them concurrently on
+    `executor` and writing the results to `output` in query order. At
+    most QUERIES_PER_WORKER queries per worker are in flight, and reading
+    waits for the oldest to be answered before going further. The line
+    "stats" is answered once every query before it is.
+
+    Queries run on threads rather than processes so that they share the
+    loaded graph, landmark index and result cache without a copy per
+    worker. Searches are pure Python and hold the GIL, so the threads do
+    not search in parallel: they overlap reading and writing with the
+    searches, rather than speeding the searches up.
+
+    A query is a source and a target, person ids or names, separated by a
+    tab, or a JSON object with "source" and "target" keys. The line "stats"
+    writes the throughput and latency summary instead.
+    """
+    limit = QUERIES_PER_WORKER * WORKERS
+    pending = deque()
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        if line == "stats":
+            while pending:
+                output.write(pending.popleft().result())
+            output.write(stats.summary())
+            continue
+        pending.append(executor.submit(answer, number, line, stats))
+        while pending and (pending[0].done() or len(pending) >= limit):
+            output.write(pending.popleft().result())
+    while pending:
+        output.write(pending.popleft().result())
+
+
+def serve_socket(path, executor, stats):
+    """
+    Serves queries from every client connecting to the Unix socket at
+    `path` until interrupted.
+    """
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            lines = (line.decode("utf-8") for line in self.rfile)
+            serve(lines, Output(SocketStream(self.wfile)), executor, stats)
+
+    with socketserver.ThreadingUnixStreamServer(path, Handler) as server:
+        print(f"Listening on {path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(path)
+
+
+class SocketStream():
+    """
+    Text stream interface over a socket's binary write file.
+    """
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, text):
+        self.wfile.write(text.encode("utf-8"))
+
+    def flush(self):
+        self.wfile.flush()
+
+
+def answer(number, line, stats):
+    """
+    Returns the JSON result for the query on line `number`.
+    """
+    start = time.perf_counter()
+    try:
+        if line.startswith("{"):
+            query = json.loads(line)
+            source, target = query["source"], query["target"]
+        else:
+            source, target = line.split("\t")
+        result = {"query": number, "source": source, "target": target}
+        source = resolve(source)
+        target = resolve(target)
+    except (ValueError, KeyError, TypeError) as e:
+        return {"query": number, "error": str(e)}
+
+    search = {"expanded": 0}
+    path = landmarks.shortest_path(
+        source, target, stats.index, stats.cache, stats=search
+    )
+    if path is None:
+        result["degrees"] = None
+    else:
+        result["degrees"] = len(path)
+        result["path"] = [
+            {"movie_id": movie_id, "person_id": person_id}
+            for movie_id, person_id in path
+        ]
+    result["expanded"] = search["expanded"]
+    result["seconds"] = time.perf_counter() - start
+    stats.record(result["seconds"])
+    return result
+
+
+def resolve(person):
+    """
+    Returns the person id for a person id or an unambiguous name.
+    """
+    graph = degrees.graph
+    if graph.person_index(person) is not None:
+        return person
+    people = graph.people_named(person)
+    if len(people) == 0:
+        raise ValueError(f"person not found: {person}")
+    elif len(people) > 1:
+        ids = ", ".join(graph.person_ids[i] for i in people)
+        raise ValueError(f"ambiguous name {person}, person ids: {ids}")
+    return graph.person_ids[people[0]]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import json
+import mmap
+import os
+import struct
+import sys
+
+from graph import StarGraph, StringTable, OFFSET
+from loader import FILES, load_csv, print_load_stats
+
+# Snapshot layout: MAGIC, the length of a JSON header as an unsigned
+# 64-bit integer, the header itself, then every buffer of the graph,
+# each starting on an ALIGNMENT byte boundary
+MAGIC = b"DEGREES\x01"
+ALIGNMENT = 8
+FILENAME = "degrees.snapshot"
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python snapshot.py directory")
+    directory = sys.argv[1]
+
+    print("Loading data...")
+    stats = []
+    graph = load_csv(directory, stats=stats)
+    print("Data loaded.")
+    print_load_stats(stats)
+    path = save(graph, directory)
+    print(f"Snapshot written to {path} ({os.path.getsize(path)} bytes).")
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def source_stamps(directory):
+    """
+    Returns the size and modification time of each CSV file in
+    `directory`, used to tell whether a snapshot is out of date.
+    """
+    stamps = {}
+    for filename in FILES:
+        path = os.path.join(directory, filename)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        stamps[filename] = [stat.st_size, stat.st_mtime_ns]
+    return stamps
+
+
+def buffers(graph):
+    """
+    Yields (name, typecode, buffer) for every buffer of a graph,
+    string tables contributing a "data" and an "offsets" buffer each.
+    """
+    for field in StarGraph.FIELDS:
+        value = getattr(graph, field)
+        if isinstance(value, StringTable):
+            yield f"{field}.data", "B", value.data
+            yield f"{field}.offsets", OFFSET, value.offsets
+        else:
+            yield field, memoryview(value).format, value
+
+
+def save(graph, directory):
+    """
+    Writes `graph` to a snapshot file in `directory`, stamped with the
+    CSV files it was loaded from, and returns the snapshot's path.
+    """
+    header = {
+        "byteorder": sys.byteorder,
+        "sources": source_stamps(directory),
+        "buffers": {},
+    }
+
+    # Lay out the buffers first, as the header records where each one starts
+    layout = []
+    position = 0
+    for name, typecode, buffer in buffers(graph):
+        view = memoryview(buffer).cast("B")
+        layout.append((position, view))
+        header["buffers"][name] = [typecode, position, view.nbytes]
+        position += aligned(view.nbytes)
+
+    encoded = json.dumps(header).encode("utf-8")
+    start = aligned(len(MAGIC) + 8 + len(encoded))
+    path = snapshot_path(directory)
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(encoded)))
+        f.write(encoded)
+        for offset, view in layout:
+            f.write(bytes(start + offset - f.tell()))
+            f.write(view)
+    os.replace(temporary, path)
+    return path
+
+
+def load(directory):
+    """
+    Maps the snapshot in `directory` into memory and returns a StarGraph
+    backed by it, without reading the data until it is used.
+
+    Returns None if there is no snapshot, if it is truncated or corrupt,
+    or if it was written on a machine of another byte order or from
+    different CSV files.
+    """
+    path = snapshot_path(directory)
+    try:
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    try:
+        arrays = map_buffers(mapping, directory)
+    except (struct.error, ValueError, KeyError, TypeError):
+        arrays = None
+    if arrays is None:
+        mapping.close()
+        return None
+
+    fields = {}
+    for field in StarGraph.FIELDS:
+        if field in arrays:
+            fields[field] = arrays[field]
+        else:
+            fields[field] = StringTable(
+                arrays[f"{field}.data"], arrays[f"{field}.offsets"]
+            )
+    return StarGraph(**fields)
+
+
+def map_buffers(mapping, directory):
+    """
+    Returns a dictionary of memoryviews of every buffer in a snapshot's
+    `mapping`, by name, or None if the snapshot is not one or is stale.
+    Raises struct.error, ValueError, KeyError or TypeError if its header
+    is corrupt.
+    """
+    if mapping[:len(MAGIC)] != MAGIC:
+        return None
+    length, = struct.unpack_from("<Q", mapping, len(MAGIC))
+    header_start = len(MAGIC) + 8
+    header = json.loads(mapping[header_start:header_start + length])
+    if (header["byteorder"] != sys.byteorder
+            or header["sources"] != source_stamps(directory)):
+        return None
+
+    start = aligned(header_start + length)
+    arrays = {}
+    for name, (typecode, offset, size) in header["buffers"].items():
+        if start + offset + size > len(mapping):
+            raise ValueError(f"snapshot buffer {name} is truncated")
+        with memoryview(mapping) as view:
+            arrays[name] = view[start + offset:start + offset + size]
+        arrays[name] = arrays[name].cast(typecode)
+    return arrays
+
+
+def aligned(size):
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,499 @@
+import csv
+import json
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import analytics
+import degrees
+import landmarks
+import loader
+import server
+import snapshot
+from names import NameIndex, edits
+from util import Node, PriorityFrontier, QueueFrontier, StackFrontier
+
+# Size of the random dataset the tests load, with names drawn from few
+# words so that some are shared and some differ by one letter
+PEOPLE = 300
+MOVIES = 120
+STARS = 450
+FIRST = ("Anna", "Anne", "Ben", "Bern", "Cara", "Kara", "Dan", "Don")
+LAST = ("Smith", "Smyth", "Jones", "Brown", "Browne", "Lee", "Li")
+SEED = 0
+
+
+def write_dataset(directory, seed=SEED):
+    """
+    Writes random people.csv, movies.csv and stars.csv files to
+    `directory`, leaving some people in no movie and repeating a few
+    stars and an unknown person, as the IMDb exports do.
+    """
+    rng = random.Random(seed)
+    people = [str(100 + 7 * i) for i in range(PEOPLE)]
+    movies = [str(5000 + 3 * i) for i in range(MOVIES)]
+    with open(os.path.join(directory, "people.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(("id", "name", "birth"))
+        for person in people:
+            name = f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+            writer.writerow((person, name, rng.choice(("", "1960", "1970"))))
+    with open(os.path.join(directory, "movies.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(("id", "title", "year"))
+        for movie in movies:
+            writer.writerow((movie, f"Movie {movie}", "2000"))
+    with open(os.path.join(directory, "stars.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(("person_id", "movie_id"))
+        cast = people[:PEOPLE * 9 // 10]
+        for _ in range(STARS):
+            writer.writerow((rng.choice(cast), rng.choice(movies)))
+        writer.writerow((people[0], movies[0]))
+        writer.writerow(("999999", movies[0]))
+
+
+def load_reference(directory):
+    """
+    Returns (names, people, movies) dictionaries of a dataset as the
+    original degrees.py loaded them, to check the graph against.
+    """
+    names, people, movies = {}, {}, {}
+    with open(os.path.join(directory, "people.csv"), encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            people[row["id"]] = {
+                "name": row["name"], "birth": row["birth"], "movies": set()
+            }
+            names.setdefault(row["name"].lower(), set()).add(row["id"])
+    with open(os.path.join(directory, "movies.csv"), encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            movies[row["id"]] = {
+                "title": row["title"], "year": row["year"], "stars": set()
+            }
+    with open(os.path.join(directory, "stars.csv"), encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row["person_id"] in people and row["movie_id"] in movies:
+                people[row["person_id"]]["movies"].add(row["movie_id"])
+                movies[row["movie_id"]]["stars"].add(row["person_id"])
+    return names, people, movies
+
+
+def reference_distances(reference, source):
+    """
+    Returns the degrees of separation from person id `source` to every
+    person it is connected to, by breadth-first search of the reference.
+    """
+    _, people, movies = reference
+    distances = {source: 0}
+    frontier = [source]
+    while frontier:
+        next_frontier = []
+        for person in frontier:
+            for movie in people[person]["movies"]:
+                for star in movies[movie]["stars"]:
+                    if star not in distances:
+                        distances[star] = distances[person] + 1
+                        next_frontier.append(star)
+        frontier = next_frontier
+    return distances
+
+
+def check_path(reference, source, target, path):
+    """
+    Asserts that `path` is a list of (movie_id, person_id) steps from
+    `source` to `target`, each between two stars of the movie.
+    """
+    _, people, movies = reference
+    person = source
+    for movie, next_person in path:
+        assert person in movies[movie]["stars"]
+        assert next_person in movies[movie]["stars"]
+        person = next_person
+    assert person == target
+
+
+@pytest.fixture(scope="module")
+def directory(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("dataset")
+    write_dataset(directory)
+    return str(directory)
+
+
+@pytest.fixture(scope="module")
+def reference(directory):
+    return load_reference(directory)
+
+
+@pytest.fixture
+def graph(directory):
+    return degrees.load_data(directory)
+
+
+def test_graph_matches_reference(graph, reference):
+    names, people, movies = reference
+    assert graph.people_count == len(people)
+    assert graph.movies_count == len(movies)
+    assert graph.edges_count == sum(len(p["movies"]) for p in people.values())
+    for person_id, person in people.items():
+        i = graph.person_index(person_id)
+        assert graph.person_ids[i] == person_id
+        assert graph.person_names[i] == person["name"]
+        assert graph.person_births[i] == person["birth"]
+        assert degrees.neighbors_for_person(person_id) == {
+            (movie, star)
+            for movie in person["movies"]
+            for star in movies[movie]["stars"]
+        }
+    for movie_id, movie in movies.items():
+        i = graph.movie_index(movie_id)
+        assert graph.movie_titles[i] == movie["title"]
+        assert {graph.person_ids[j] for j in graph.stars_for(i)} == (
+            movie["stars"]
+        )
+    for name, ids in names.items():
+        assert {graph.person_ids[i] for i in graph.people_named(name)} == ids
+    assert graph.person_index("999999") is None
+    assert graph.people_named("Nobody Here") == []
+
+
+def random_pairs(reference, count, seed=SEED):
+    rng = random.Random(seed)
+    people = sorted(reference[1])
+    return [(rng.choice(people), rng.choice(people)) for _ in range(count)]
+
+
+@pytest.mark.parametrize("bidirectional", [False, True])
+def test_shortest_path_matches_reference(graph, reference, bidirectional):
+    for source, target in random_pairs(reference, 200):
+        distances = reference_distances(reference, source)
+        path = degrees.shortest_path(source, target, bidirectional)
+        if target not in distances:
+            assert path is None
+        else:
+            assert len(path) == distances[target]
+            check_path(reference, source, target, path)
+
+
+def test_shortest_path_edge_cases(graph, reference):
+    person = sorted(reference[1])[0]
+    assert degrees.shortest_path(person, person) == []
+    assert degrees.shortest_path(person, person, bidirectional=True) == []
+    assert degrees.shortest_path(person, "999999") is None
+    assert degrees.shortest_path("999999", person, bidirectional=True) is None
+
+
+@pytest.mark.parametrize("frontier_class, end", [
+    (StackFrontier, -1), (QueueFrontier, 0),
+])
+def test_frontier_matches_list(frontier_class, end):
+    # The original frontiers kept a list, removing from its end or start
+    rng = random.Random(SEED)
+    frontier = frontier_class()
+    expected = []
+    for _ in range(5000):
+        operation = rng.random()
+        if operation < 0.5:
+            node = Node(rng.randrange(50), None, None)
+            frontier.add(node)
+            expected.append(node)
+        elif operation < 0.6:
+            node = Node(rng.randrange(50), None, None)
+            frontier.insert(0, node)
+            expected.insert(0, node)
+        elif expected:
+            assert frontier.remove() is expected.pop(end)
+        state = rng.randrange(50)
+        assert frontier.contains_state(state) == any(
+            node.state == state for node in expected
+        )
+        assert len(frontier) == len(expected)
+        assert frontier.empty() == (not expected)
+    while expected:
+        assert frontier.remove() is expected.pop(end)
+    with pytest.raises(Exception):
+        frontier.remove()
+
+
+def test_priority_frontier_order():
+    rng = random.Random(SEED)
+    frontier = PriorityFrontier()
+    entries = []
+    for order in range(1000):
+        node = Node(rng.randrange(100), None, None)
+        priority = rng.randrange(20)
+        frontier.add(node, priority)
+        entries.append((priority, order, node))
+    entries.sort(key=lambda entry: entry[:2])
+    for _, _, node in entries:
+        assert frontier.contains_state(node.state)
+        assert frontier.remove() is node
+    assert frontier.empty() and not frontier.contains_state(0)
+
+
+def graph_fields(graph):
+    """
+    Returns the contents of every buffer of a graph as lists.
+    """
+    return {
+        name: list(memoryview(buffer).cast("B"))
+        for name, _, buffer in snapshot.buffers(graph)
+    }
+
+
+def test_snapshot_round_trip(tmp_path):
+    write_dataset(tmp_path)
+    graph = loader.load_csv(tmp_path)
+    snapshot.save(graph, tmp_path)
+    mapped = snapshot.load(tmp_path)
+    assert mapped is not None
+    assert graph_fields(mapped) == graph_fields(graph)
+    assert degrees.load_data(tmp_path).people_count == graph.people_count
+
+
+def test_snapshot_rejects_stale_and_corrupt_files(tmp_path):
+    assert snapshot.load(tmp_path) is None
+    write_dataset(tmp_path)
+    path = snapshot.save(loader.load_csv(tmp_path), tmp_path)
+    with open(path, "rb") as f:
+        data = f.read()
+
+    for corrupt in (
+        b"", data[:5], data[:12], data[:40], data[:-16],
+        b"X" + data[1:], data[:20] + b"\xff" * 8 + data[28:],
+    ):
+        with open(path, "wb") as f:
+            f.write(corrupt)
+        assert snapshot.load(tmp_path) is None
+
+    with open(path, "wb") as f:
+        f.write(data)
+    assert snapshot.load(tmp_path) is not None
+    with open(os.path.join(tmp_path, "stars.csv"), "a") as f:
+        f.write("100,5000\n")
+    assert snapshot.load(tmp_path) is None
+
+
+def test_percentile_is_nearest_rank():
+    assert server.percentile([], 0.5) is None
+    assert server.percentile([1.0], 0.95) == 1.0
+    assert server.percentile([1.0, 2.0], 0.5) == 1.0
+    assert server.percentile([1.0, 2.0], 0.95) == 2.0
+    values = list(range(1, 101))
+    assert server.percentile(values, 0.5) == 50
+    assert server.percentile(values, 0.95) == 95
+    assert server.percentile(values, 0) == 1
+    assert server.percentile(values, 1) == 100
+
+
+class Lines():
+    """
+    Output collecting the JSON lines written, which also counts the
+    queries submitted to an executor but not yet written.
+    """
+
+    def __init__(self):
+        self.results = []
+        self.submitted = 0
+        self.most_pending = 0
+
+    def write(self, result):
+        self.results.append(result)
+
+    def submit(self, executor, *args):
+        self.submitted += 1
+        written = sum("query" in result for result in self.results)
+        self.most_pending = max(self.most_pending, self.submitted - written)
+        return ThreadPoolExecutor.submit(executor, *args)
+
+
+def test_serve_answers_in_order(graph, reference):
+    pairs = random_pairs(reference, 100)
+    lines = [f"{source}\t{target}" for source, target in pairs]
+    lines[10] = json.dumps({"source": pairs[10][0], "target": pairs[10][1]})
+    lines[20] = "nobody\there"
+    lines[30:30] = ["", "stats"]
+
+    output = Lines()
+    stats = server.QueryStats(cache=landmarks.PathCache())
+    with ThreadPoolExecutor(server.WORKERS) as executor:
+        executor.submit = lambda *args: output.submit(executor, *args)
+        server.serve(iter(lines), output, executor, stats)
+
+    summary = output.results[30]
+    assert summary["queries"] == 29
+    assert summary["p50_ms"] <= summary["p95_ms"] <= summary["max_ms"]
+    answers = output.results[:30] + output.results[31:]
+    assert [answer["query"] for answer in answers] == (
+        list(range(1, 31)) + list(range(33, 103))
+    )
+    assert "error" in answers[20]
+    assert output.most_pending <= server.QUERIES_PER_WORKER * server.WORKERS
+    for answer, (source, target) in zip(answers, pairs):
+        if "error" in answer:
+            continue
+        distances = reference_distances(reference, source)
+        assert answer["degrees"] == distances.get(target)
+
+
+def test_landmark_paths_match_reference(graph, reference):
+    index = landmarks.LandmarkIndex(
+        graph, landmarks.choose_landmarks(graph, 4)
+    )
+    cache = landmarks.PathCache()
+    pairs = random_pairs(reference, 200)
+    pairs += [(graph.person_ids[landmark], target)
+              for landmark in index.landmarks for target, _ in pairs[:20]]
+    for source, target in pairs + pairs[:50]:
+        distances = reference_distances(reference, source)
+        path = landmarks.shortest_path(source, target, index, cache)
+        if target not in distances:
+            assert path is None
+        else:
+            assert len(path) == distances[target]
+            check_path(reference, source, target, path)
+    assert cache.stats()["hits"] >= 50
+
+
+def test_path_cache_evicts_least_recently_used():
+    cache = landmarks.PathCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == (True, 1)
+    cache.put("c", 3)
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.get("c") == (True, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_landmark_index_rejects_changed_dataset(tmp_path):
+    write_dataset(tmp_path)
+    graph = degrees.load_data(tmp_path)
+    path = landmarks.index_path(tmp_path)
+    landmarks.LandmarkIndex(graph, [0, 1]).save(path)
+    index = landmarks.LandmarkIndex.load(graph, path)
+    assert index.landmarks == [0, 1]
+
+    # Same numbers of people and stars, but one star in another movie
+    stars = os.path.join(tmp_path, "stars.csv")
+    with open(stars) as f:
+        rows = f.read().splitlines()
+    person, movie = rows[1].split(",")
+    rows[1] = f"{person},{int(movie) + 3 if movie != '5357' else 5000}"
+    with open(stars, "w") as f:
+        f.write("\n".join(rows) + "\n")
+    graph = degrees.load_data(tmp_path)
+    assert landmarks.LandmarkIndex.load(graph, path) is None
+
+
+def test_chunked_load_matches_single_chunk(tmp_path, monkeypatch):
+    write_dataset(tmp_path)
+    with open(os.path.join(tmp_path, "people.csv"), "a") as f:
+        f.write('1,"Last, First",1980\n')
+    whole = loader.load_csv(tmp_path, workers=1)
+    monkeypatch.setattr(loader, "CHUNK_SIZE", 256)
+    stats = []
+    chunked = loader.load_csv(tmp_path, workers=2, stats=stats)
+    assert graph_fields(chunked) == graph_fields(whole)
+    assert chunked.people_named("last, first") == [chunked.person_index("1")]
+    assert [step["file"] for step in stats] == list(loader.FILES) + ["graph"]
+    assert stats[0]["rows"] == PEOPLE + 1
+
+
+def test_loader_handles_empty_files_and_missing_columns(tmp_path):
+    write_dataset(tmp_path)
+    stars = os.path.join(tmp_path, "stars.csv")
+    open(stars, "w").close()
+    graph = loader.load_csv(tmp_path, workers=1)
+    assert graph.people_count == PEOPLE and graph.edges_count == 0
+
+    with open(stars, "w") as f:
+        f.write("person_id,film_id\n100,5000\n")
+    with pytest.raises(ValueError, match="movie_id"):
+        loader.load_csv(tmp_path, workers=1)
+
+
+def test_analytics_match_reference(graph, directory, reference):
+    people = reference[1]
+    separations = {}
+    eccentricities = {}
+    components = set()
+    for person in people:
+        distances = reference_distances(reference, person)
+        components.add(frozenset(distances))
+        eccentricities[graph.person_index(person)] = max(distances.values())
+        for distance in distances.values():
+            separations[distance] = separations.get(distance, 0) + 1
+
+    assert sorted(analytics.component_sizes(graph)) == sorted(
+        len(component) for component in components
+    )
+    found, found_eccentricities = analytics.search_all(
+        directory, range(graph.people_count)
+    )
+    assert found == [separations[d] for d in range(len(separations))]
+    assert found_eccentricities == eccentricities
+
+
+def levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, letter in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1, current[j - 1] + 1,
+                previous[j - 1] + (letter != other)
+            ))
+        previous = current
+    return previous[-1]
+
+
+def test_edits_matches_levenshtein():
+    rng = random.Random(SEED)
+    for _ in range(2000):
+        a = "".join(rng.choice("abc") for _ in range(rng.randrange(5)))
+        b = "".join(rng.choice("abc") for _ in range(rng.randrange(5)))
+        assert edits(a, b) == min(levenshtein(a, b), 2)
+
+
+def test_name_search_matches_brute_force(graph, reference):
+    names = reference[0]
+    index = NameIndex(graph)
+    everything = len(names)
+    for k in range(len(index.names)):
+        people = {graph.person_ids[i] for i in index.people(k)}
+        assert people == names[index.names[k]]
+
+    for prefix in ("a", "ann", "ben s", "kara browne", "x", ""):
+        found = {index.names[k] for k in index.prefix(prefix, everything)}
+        assert found == {name for name in names if name.startswith(prefix)}
+
+    for query in ("Ana Smith", "smith anne", "Benn", "Dom Lii", "Zed"):
+        words = query.lower().split()
+        expected = {
+            name for name in names
+            if all(
+                any(levenshtein(word, other) <= 1 for other in name.split())
+                for word in words
+            )
+        }
+        found = index.fuzzy(query, everything)
+        assert {index.names[k] for _, k in found} == expected
+        assert [score for score, _ in found] == sorted(
+            (score for score, _ in found), reverse=True
+        )
+
+    results = index.search("Anna Smith", 3)
+    assert index.names[results[0][1]] == "anna smith"
+    assert results[0][0] == 1.0
+
+
+def test_name_index_built_with_data(directory):
+    degrees.load_data(directory)
+    assert degrees.names is None
+    degrees.load_data(directory, index_names=True)
+    assert degrees.names is not None
+    assert degrees.name_index() is degrees.names
+    assert len(degrees.names.names) == len(NameIndex(degrees.graph).names)
@@ -1,3 +1,8 @@
+import heapq
+import itertools
+from collections import deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -6,17 +11,31 @@ class Node():
 
 
 class StackFrontier():
+    """
+    Last in, first out frontier.
+
+    Nodes are kept in a deque so both ends can be pushed and popped in
+    O(1), and `states` counts the nodes for each state so that
+    contains_state is a hash lookup instead of a scan.
+    """
+
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
-        
+        self._count(node.state, 1)
+
     def insert(self, order, node):
-        self.frontier.insert(order, node)
+        if order == 0:
+            self.frontier.appendleft(node)
+        else:
+            self.frontier.insert(order, node)
+        self._count(node.state, 1)
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -25,20 +44,60 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self._count(node.state, -1)
             return node
 
+    def __len__(self):
+        return len(self.frontier)
+
+    def _count(self, state, change):
+        count = self.states.get(state, 0) + change
+        if count:
+            self.states[state] = count
+        else:
+            del self.states[state]
+
 
 class QueueFrontier(StackFrontier):
+    """
+    First in, first out frontier.
+    """
 
     def remove(self):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self._count(node.state, -1)
             return node
 
 
+class PriorityFrontier(StackFrontier):
+    """
+    Frontier for weighted search that removes the node with the lowest
+    priority first, breaking ties in insertion order.
+
+    A state may be added again with a lower priority, the stale entry
+    is then removed later like any other node.
+    """
 
+    def __init__(self):
+        self.frontier = []
+        self.states = {}
+        self.counter = itertools.count()
+
+    def add(self, node, priority=0):
+        heapq.heappush(self.frontier, (priority, next(self.counter), node))
+        self._count(node.state, 1)
+
+    def insert(self, order, node):
+        raise Exception("cannot insert into a priority frontier")
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = heapq.heappop(self.frontier)[2]
+            self._count(node.state, -1)
+            return node
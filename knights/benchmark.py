@@ -0,0 +1,171 @@
+import csv
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from generate import DEPTH, generate_puzzle
+from logic import *
+
+PEOPLE = (2, 4, 6, 8, 12, 20, 40)
+PUZZLES = 5
+SEED = 0
+OUTPUT = "benchmark.csv"
+
+# People in the puzzle timed on growing numbers of worker processes
+PARALLEL_PEOPLE = 13
+
+# Largest number of symbols each method is run on, as they enumerate
+# every model
+LIMITS = {
+    "enumerate": 12, "compiled": 24, "numpy": 30, "parallel": 24,
+    "dpll": None, "kb-models": 24, "kb-dpll": None,
+}
+
+FIELDS = (
+    "people", "depth", "method", "queries", "seconds",
+    "models", "decisions", "conflicts", "peak_bytes",
+)
+
+
+def main():
+    if len(sys.argv) > 4:
+        sys.exit("Usage: python benchmark.py [puzzles] [depth] [output]")
+    puzzles = int(sys.argv[1]) if len(sys.argv) >= 2 else PUZZLES
+    depth = int(sys.argv[2]) if len(sys.argv) >= 3 else DEPTH
+    output = sys.argv[3] if len(sys.argv) == 4 else OUTPUT
+    rng = random.Random(SEED)
+    generated = {
+        people: [generate_puzzle(rng, people, depth) for _ in range(puzzles)]
+        for people in PEOPLE
+    }
+    print_sizes(generated)
+
+    rows = []
+    print(f"{'people':>6} {'method':>10} {'seconds':>10} {'queries/sec':>12} "
+          f"{'models':>12} {'peak MB':>8}")
+    for people, puzzles in generated.items():
+        answers = {}
+        for method, limit in LIMITS.items():
+            if limit is not None and 2 * people > limit:
+                continue
+            answers[method], row = measure(method, puzzles)
+            row.update(people=people, depth=depth)
+            rows.append(row)
+            print(f"{people:>6} {method:>10} {row['seconds']:>10.4f} "
+                  f"{row['queries'] / row['seconds']:>12.1f} "
+                  f"{row['models']:>12} {row['peak_bytes'] / 2 ** 20:>8.2f}")
+
+        if any(answer != answers["dpll"] for answer in answers.values()):
+            sys.exit(f"Methods disagree on puzzles of {people} people")
+
+    with open(output, "w", newline="") as f:
+        writer = csv.DictWriter(f, FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Results written to {output}.")
+
+    print()
+    benchmark_workers(generate_puzzle(rng, PARALLEL_PEOPLE, depth))
+
+
+def measure(method, puzzles):
+    """
+    Answers every query of `puzzles` with `method`, returning the answers
+    and a row of results. The peak memory allocated is measured in a
+    second run over the first puzzle only, as tracing slows the run, and
+    does not count worker processes.
+    """
+    stats = {}
+    start = time.perf_counter()
+    answers = [
+        answer(method, knowledge, symbols, stats)
+        for knowledge, symbols in puzzles
+    ]
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    answer(method, *puzzles[0])
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return answers, {
+        "method": method,
+        "queries": sum(len(symbols) for _, symbols in puzzles),
+        "seconds": seconds,
+        "models": stats.get("models", 0),
+        "decisions": stats.get("decisions", 0),
+        "conflicts": stats.get("conflicts", 0),
+        "peak_bytes": peak,
+    }
+
+
+def answer(method, knowledge, symbols, stats=None):
+    """
+    Returns whether `knowledge` entails each symbol, through model_check
+    or, for the "kb-" methods, a KnowledgeBase answering every query,
+    adding the work done to `stats`.
+    """
+    if not method.startswith("kb-"):
+        return [
+            model_check(knowledge, symbol, method, stats=stats)
+            for symbol in symbols
+        ]
+    knowledge_base = KnowledgeBase(knowledge, method=method[3:])
+    answers = [knowledge_base.entails(symbol) for symbol in symbols]
+    if stats is not None:
+        stats["models"] = stats.get("models", 0) + knowledge_base.evaluated
+        for key in ("decisions", "conflicts"):
+            stats[key] = stats.get(key, 0) + knowledge_base.solver.stats[key]
+    return answers
+
+
+def benchmark_workers(puzzle):
+    """
+    Times the parallel method on one entailed query, which must check
+    every model, with 1, 2, 4... workers up to the number of CPUs, and
+    prints the speedup over one worker overall and per worker.
+    """
+    knowledge, symbols = puzzle
+    query = Or(symbols[0], symbols[len(symbols) // 2])
+    counts = [1]
+    while counts[-1] < (os.cpu_count() or 1):
+        counts.append(min(2 * counts[-1], os.cpu_count()))
+
+    print(f"{len(symbols)} symbols, {2 ** len(symbols)} models")
+    print(f"{'workers':>7} {'seconds':>10} {'speedup':>8} {'per core':>9}")
+    single = None
+    for workers in counts:
+        start = time.perf_counter()
+        if not model_check(knowledge, query, "parallel", workers):
+            sys.exit("Parallel method missed an entailment")
+        seconds = time.perf_counter() - start
+        single = single or seconds
+        print(f"{workers:>7} {seconds:>10.3f} {single / seconds:>8.2f} "
+              f"{single / seconds / workers:>9.2f}")
+
+
+def print_sizes(generated):
+    """
+    Prints the mean number of nodes in the generated knowledge as a tree,
+    as distinct interned nodes, and both again once simplified.
+    """
+    print(f"{'people':>6} {'tree':>8} {'interned':>9} "
+          f"{'simplified':>11} {'interned':>9} {'reduction':>10}")
+    for people, puzzles in generated.items():
+        counts = [
+            node_counts(knowledge) + node_counts(simplify(knowledge))
+            for knowledge, _ in puzzles
+        ]
+        tree, distinct, simple_tree, simple_distinct = [
+            sum(column) / len(counts) for column in zip(*counts)
+        ]
+        print(f"{people:>6} {tree:>8.0f} {distinct:>9.0f} "
+              f"{simple_tree:>11.0f} {simple_distinct:>9.0f} "
+              f"{1 - simple_distinct / tree:>10.1%}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
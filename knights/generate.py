@@ -0,0 +1,116 @@
+import random
+import sys
+
+from logic import *
+
+DEPTH = 2
+
+
+def main():
+    if len(sys.argv) not in (2, 3, 4):
+        sys.exit("Usage: python generate.py people [depth] [seed]")
+    people = int(sys.argv[1])
+    depth = int(sys.argv[2]) if len(sys.argv) >= 3 else DEPTH
+    seed = int(sys.argv[3]) if len(sys.argv) == 4 else None
+    if people < 1 or depth < 1:
+        sys.exit("People and depth must be at least 1")
+
+    rng = random.Random(seed)
+    knights, knaves = people_symbols(people)
+    statements = random_statements(rng, knights, knaves, depth)
+    for i, statement in enumerate(statements):
+        print(f"{i} says \"{statement.formula()}\"")
+
+    knowledge_base = KnowledgeBase(puzzle_knowledge(knights, knaves, statements))
+    for symbol in knights + knaves:
+        if knowledge_base.entails(symbol):
+            print(f"    {symbol}")
+
+
+def generate_puzzle(rng, people, depth=DEPTH):
+    """
+    Returns the knowledge of a random knights and knaves puzzle, where
+    every person is a knight or a knave and makes one statement nested
+    up to `depth` deep, and the list of its symbols.
+    """
+    knights, knaves = people_symbols(people)
+    statements = random_statements(rng, knights, knaves, depth)
+    return puzzle_knowledge(knights, knaves, statements), knights + knaves
+
+
+def people_symbols(people):
+    """
+    Returns the lists of symbols for each person being a knight or a knave.
+    """
+    knights = [Symbol(f"{i} is a Knight") for i in range(people)]
+    knaves = [Symbol(f"{i} is a Knave") for i in range(people)]
+    return knights, knaves
+
+
+def random_statements(rng, knights, knaves, depth):
+    """
+    Returns a statement for each person, drawn so that the puzzle has at
+    least one solution: each person is secretly made a knight or a knave,
+    and statements are redrawn until knights' are true and knaves' false.
+    """
+    model = {}
+    for knight, knave in zip(knights, knaves):
+        model[knight.name] = rng.random() < 0.5
+        model[knave.name] = not model[knight.name]
+
+    statements = []
+    for knight in knights:
+        while True:
+            statement = random_statement(rng, knights, knaves, depth)
+            if statement.evaluate(model) == model[knight.name]:
+                break
+        statements.append(statement)
+    return statements
+
+
+def puzzle_knowledge(knights, knaves, statements):
+    """
+    Returns the knowledge that each person is a knight or a knave but
+    not both, and that person i's statement is true if and only if they
+    are a knight.
+    """
+    knowledge = And()
+    for knight, knave, statement in zip(knights, knaves, statements):
+        knowledge.add(Or(knight, knave))
+        knowledge.add(Not(And(knight, knave)))
+        knowledge.add(Implication(knight, statement))
+        knowledge.add(Implication(knave, Not(statement)))
+    return knowledge
+
+
+def random_statement(rng, knights, knaves, depth):
+    """
+    Returns a random claim nested up to `depth` deep. At depth 1 it says
+    one person is a knight or a knave. Deeper claims negate or combine
+    shallower ones, or quote what someone said, which is true if and only
+    if the speaker is a knight.
+    """
+    person = rng.randrange(len(knights))
+    if depth <= 1:
+        return rng.choice((knights, knaves))[person]
+
+    kind = rng.randrange(6)
+    if kind == 0:
+        return Not(random_statement(rng, knights, knaves, depth - 1))
+    elif kind == 5:
+        quoted = random_statement(rng, knights, knaves, depth - 1)
+        return Biconditional(knights[person], quoted)
+
+    left = random_statement(rng, knights, knaves, depth - 1)
+    right = random_statement(rng, knights, knaves, depth - 1)
+    if kind == 1:
+        return And(left, right)
+    elif kind == 2:
+        return Or(left, right)
+    elif kind == 3:
+        return Implication(left, right)
+    return Biconditional(left, right)
+
+
+if __name__ == "__main__":
+    main()
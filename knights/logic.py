@@ -1,8 +1,17 @@
 import itertools
+import multiprocessing
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from sat import Solver
 
 
 class Sentence():
 
+    # Set on the shared nodes returned by intern, which must not change
+    interned = False
+
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
@@ -15,6 +24,33 @@ class Sentence():
         """Returns a set of all symbols in the logical sentence."""
         return set()
 
+    def operands(self):
+        """Returns the list of sentences the sentence is made of."""
+        return []
+
+    def fold(self):
+        """Returns an equivalent sentence over simplified operands."""
+        return self
+
+    def bitwise(self, program):
+        """Returns a bitwise expression over `program` for the sentence."""
+        raise Exception("nothing to compile")
+
+    def compile(self, symbols=None):
+        """Returns a reusable compiled evaluator for the sentence."""
+        return Compiled(self, symbols)
+
+    def tseitin(self, cnf):
+        """Returns a literal of `cnf` constrained to equal the sentence."""
+        raise Exception("nothing to encode")
+
+    def __getstate__(self):
+        """Pickles interned sentences as plain ones, to be interned again."""
+        state = dict(self.__dict__)
+        for key in ("interned", "hash_value", "symbol_set", "simplified"):
+            state.pop(key, None)
+        return state
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
@@ -68,6 +104,15 @@ class Symbol(Sentence):
     def symbols(self):
         return {self.name}
 
+    def operands(self):
+        return []
+
+    def bitwise(self, program):
+        return f"columns[{program.index[self.name]}]"
+
+    def tseitin(self, cnf):
+        return cnf.variable(self.name)
+
 
 class Not(Sentence):
     def __init__(self, operand):
@@ -75,9 +120,13 @@ class Not(Sentence):
         self.operand = operand
 
     def __eq__(self, other):
+        if self.interned and getattr(other, "interned", False):
+            return self is other
         return isinstance(other, Not) and self.operand == other.operand
 
     def __hash__(self):
+        if self.interned:
+            return self.hash_value
         return hash(("not", hash(self.operand)))
 
     def __repr__(self):
@@ -90,8 +139,28 @@ class Not(Sentence):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
     def symbols(self):
+        if self.interned:
+            return set(self.symbol_set)
         return self.operand.symbols()
 
+    def operands(self):
+        return [self.operand]
+
+    def fold(self):
+        operand = simplify(self.operand)
+        if isinstance(operand, Not):
+            return operand.operand
+        value = constant(operand)
+        if value is not None:
+            return Or() if value else And()
+        return Not(operand)
+
+    def bitwise(self, program):
+        return f"{program.name(self.operand)} ^ mask"
+
+    def tseitin(self, cnf):
+        return -cnf.literal(self.operand)
+
 
 class And(Sentence):
     def __init__(self, *conjuncts):
@@ -100,9 +169,13 @@ class And(Sentence):
         self.conjuncts = list(conjuncts)
 
     def __eq__(self, other):
+        if self.interned and getattr(other, "interned", False):
+            return self is other
         return isinstance(other, And) and self.conjuncts == other.conjuncts
 
     def __hash__(self):
+        if self.interned:
+            return self.hash_value
         return hash(
             ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
         )
@@ -114,6 +187,8 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
+        if self.interned:
+            raise TypeError("interned sentences are immutable")
         Sentence.validate(conjunct)
         self.conjuncts.append(conjunct)
 
@@ -127,7 +202,41 @@ class And(Sentence):
                            for conjunct in self.conjuncts])
 
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        if self.interned:
+            return set(self.symbol_set)
+        return set().union(*[conjunct.symbols() for conjunct in self.conjuncts])
+
+    def operands(self):
+        return self.conjuncts
+
+    def fold(self):
+        conjuncts = {}
+        for conjunct in self.conjuncts:
+            conjunct = simplify(conjunct)
+            parts = conjunct.conjuncts if isinstance(conjunct, And) else [conjunct]
+            for part in parts:
+                if constant(part) is False:
+                    return Or()
+                conjuncts[id(part)] = part
+        for part in conjuncts.values():
+            if isinstance(part, Not) and id(part.operand) in conjuncts:
+                return Or()
+        if len(conjuncts) == 1:
+            return next(iter(conjuncts.values()))
+        return And(*conjuncts.values())
+
+    def bitwise(self, program):
+        if not self.conjuncts:
+            return "mask"
+        return " & ".join(program.name(conjunct) for conjunct in self.conjuncts)
+
+    def tseitin(self, cnf):
+        literals = [cnf.literal(conjunct) for conjunct in self.conjuncts]
+        v = cnf.new_variable()
+        for literal in literals:
+            cnf.clauses.append([-v, literal])
+        cnf.clauses.append([v] + [-literal for literal in literals])
+        return v
 
 
 class Or(Sentence):
@@ -137,9 +246,13 @@ class Or(Sentence):
         self.disjuncts = list(disjuncts)
 
     def __eq__(self, other):
+        if self.interned and getattr(other, "interned", False):
+            return self is other
         return isinstance(other, Or) and self.disjuncts == other.disjuncts
 
     def __hash__(self):
+        if self.interned:
+            return self.hash_value
         return hash(
             ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
         )
@@ -158,7 +271,41 @@ class Or(Sentence):
                             for disjunct in self.disjuncts])
 
     def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        if self.interned:
+            return set(self.symbol_set)
+        return set().union(*[disjunct.symbols() for disjunct in self.disjuncts])
+
+    def operands(self):
+        return self.disjuncts
+
+    def fold(self):
+        disjuncts = {}
+        for disjunct in self.disjuncts:
+            disjunct = simplify(disjunct)
+            parts = disjunct.disjuncts if isinstance(disjunct, Or) else [disjunct]
+            for part in parts:
+                if constant(part) is True:
+                    return And()
+                disjuncts[id(part)] = part
+        for part in disjuncts.values():
+            if isinstance(part, Not) and id(part.operand) in disjuncts:
+                return And()
+        if len(disjuncts) == 1:
+            return next(iter(disjuncts.values()))
+        return Or(*disjuncts.values())
+
+    def bitwise(self, program):
+        if not self.disjuncts:
+            return "0"
+        return " | ".join(program.name(disjunct) for disjunct in self.disjuncts)
+
+    def tseitin(self, cnf):
+        literals = [cnf.literal(disjunct) for disjunct in self.disjuncts]
+        v = cnf.new_variable()
+        for literal in literals:
+            cnf.clauses.append([v, -literal])
+        cnf.clauses.append([-v] + literals)
+        return v
 
 
 class Implication(Sentence):
@@ -169,11 +316,15 @@ class Implication(Sentence):
         self.consequent = consequent
 
     def __eq__(self, other):
+        if self.interned and getattr(other, "interned", False):
+            return self is other
         return (isinstance(other, Implication)
                 and self.antecedent == other.antecedent
                 and self.consequent == other.consequent)
 
     def __hash__(self):
+        if self.interned:
+            return self.hash_value
         return hash(("implies", hash(self.antecedent), hash(self.consequent)))
 
     def __repr__(self):
@@ -189,8 +340,36 @@ class Implication(Sentence):
         return f"{antecedent} => {consequent}"
 
     def symbols(self):
+        if self.interned:
+            return set(self.symbol_set)
         return set.union(self.antecedent.symbols(), self.consequent.symbols())
 
+    def operands(self):
+        return [self.antecedent, self.consequent]
+
+    def fold(self):
+        antecedent = simplify(self.antecedent)
+        consequent = simplify(self.consequent)
+        if antecedent is consequent:
+            return And()
+        if constant(antecedent) is not None:
+            return consequent if constant(antecedent) else And()
+        if constant(consequent) is not None:
+            return And() if constant(consequent) else simplify(Not(antecedent))
+        return Implication(antecedent, consequent)
+
+    def bitwise(self, program):
+        antecedent = program.name(self.antecedent)
+        consequent = program.name(self.consequent)
+        return f"({antecedent} ^ mask) | {consequent}"
+
+    def tseitin(self, cnf):
+        a = cnf.literal(self.antecedent)
+        b = cnf.literal(self.consequent)
+        v = cnf.new_variable()
+        cnf.clauses.extend([[-v, -a, b], [v, a], [v, -b]])
+        return v
+
 
 class Biconditional(Sentence):
     def __init__(self, left, right):
@@ -200,11 +379,15 @@ class Biconditional(Sentence):
         self.right = right
 
     def __eq__(self, other):
+        if self.interned and getattr(other, "interned", False):
+            return self is other
         return (isinstance(other, Biconditional)
                 and self.left == other.left
                 and self.right == other.right)
 
     def __hash__(self):
+        if self.interned:
+            return self.hash_value
         return hash(("biconditional", hash(self.left), hash(self.right)))
 
     def __repr__(self):
@@ -222,17 +405,581 @@ class Biconditional(Sentence):
         return f"{left} <=> {right}"
 
     def symbols(self):
+        if self.interned:
+            return set(self.symbol_set)
         return set.union(self.left.symbols(), self.right.symbols())
 
+    def operands(self):
+        return [self.left, self.right]
+
+    def fold(self):
+        left = simplify(self.left)
+        right = simplify(self.right)
+        if left is right:
+            return And()
+        if constant(left) is not None:
+            left, right = right, left
+        if constant(right) is not None:
+            return left if constant(right) else simplify(Not(left))
+        if isinstance(left, Not) and left.operand is right:
+            return Or()
+        if isinstance(right, Not) and right.operand is left:
+            return Or()
+        return Biconditional(left, right)
+
+    def bitwise(self, program):
+        left = program.name(self.left)
+        right = program.name(self.right)
+        return f"{left} ^ {right} ^ mask"
+
+    def tseitin(self, cnf):
+        a = cnf.literal(self.left)
+        b = cnf.literal(self.right)
+        v = cnf.new_variable()
+        cnf.clauses.extend([[-v, -a, b], [-v, a, -b], [v, a, b], [v, -a, -b]])
+        return v
+
+
+# Interned sentences, keyed on their class and name or the identities of
+# their interned operands, kept only while in use
+INTERNED = weakref.WeakValueDictionary()
+
+
+def intern(sentence, memo=None):
+    """
+    Returns the interned sentence equal to `sentence`. Interned sentences
+    are immutable nodes shared by all equal sentences, so they compare by
+    identity, and compute their hash and symbols once.
+    """
+    if sentence.interned:
+        return sentence
+    if memo is None:
+        memo = {}
+    if id(sentence) in memo:
+        return memo[id(sentence)]
+
+    operands = [intern(operand, memo) for operand in sentence.operands()]
+    if isinstance(sentence, Symbol):
+        key = (Symbol, sentence.name)
+    else:
+        key = (type(sentence),) + tuple(id(operand) for operand in operands)
+    node = INTERNED.get(key)
+    if node is None:
+        if isinstance(sentence, Symbol):
+            node = Symbol(sentence.name)
+            node.symbol_set = frozenset([sentence.name])
+        else:
+            node = type(sentence)(*operands)
+            node.symbol_set = frozenset().union(
+                *[operand.symbol_set for operand in operands]
+            )
+        node.hash_value = hash(node)
+        node.interned = True
+        INTERNED[key] = node
+    memo[id(sentence)] = node
+    return node
+
+
+def simplify(sentence):
+    """
+    Returns an interned sentence equivalent to `sentence`, with nested
+    conjunctions and disjunctions flattened, repeated operands removed,
+    double negations cancelled and constants folded. The empty And()
+    stands for true and the empty Or() for false.
+    """
+    node = intern(sentence)
+    if "simplified" not in node.__dict__:
+        node.simplified = intern(node.fold())
+    return node.simplified
+
+
+def constant(sentence):
+    """
+    Returns True for the empty conjunction, False for the empty
+    disjunction, and None for any other sentence.
+    """
+    if isinstance(sentence, And) and not sentence.conjuncts:
+        return True
+    if isinstance(sentence, Or) and not sentence.disjuncts:
+        return False
+    return None
+
+
+def node_counts(sentence):
+    """
+    Returns the number of nodes in the tree of `sentence`, and the number
+    of distinct subsentences, each stored once when interned.
+    """
+    sizes = {}
+
+    def size(node):
+        if id(node) not in sizes:
+            sizes[id(node)] = 1 + sum(size(operand) for operand in node.operands())
+        return sizes[id(node)]
+
+    return size(intern(sentence)), len(sizes)
+
+
+class Program():
+    """
+    Straight-line Python code evaluating sentences with bitwise operations.
+
+    Every distinct subsentence is computed once into its own variable from
+    `columns`, one bit-vector per symbol, where bit j holds the symbol's
+    value in model j, and `mask`, the bit-vector with every model's bit set.
+    """
+
+    def __init__(self, symbols):
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.lines = []
+        self.names = {}
+
+    def name(self, sentence):
+        """Returns the variable holding the value of `sentence`."""
+        if sentence not in self.names:
+            expression = sentence.bitwise(self)
+            self.names[sentence] = f"t{len(self.names)}"
+            self.lines.append(f"    {self.names[sentence]} = {expression}")
+        return self.names[sentence]
+
+    def function(self, sentence):
+        """Returns a Python function of (columns, mask) for `sentence`."""
+        result = self.name(sentence)
+        source = "\n".join(
+            ["def evaluate(columns, mask):"] + self.lines + [f"    return {result}"]
+        )
+        namespace = {}
+        exec(source, namespace)
+        return namespace["evaluate"]
+
+
+class Compiled():
+    """
+    A sentence compiled once into a flat Python function over bit-vectors,
+    evaluating it in many models at once.
+
+    `symbols` lists the symbol names in column order, by default sorted.
+    """
+
+    def __init__(self, sentence, symbols=None):
+        Sentence.validate(sentence)
+        self.sentence = intern(sentence)
+        if symbols is None:
+            symbols = sorted(self.sentence.symbols())
+        self.symbols = list(symbols)
+        program = Program(self.symbols)
+        self.function = program.function(self.sentence)
+        self.size = len(program.lines)
+
+    def __call__(self, columns, mask):
+        """
+        Returns the bit-vector of models in which the sentence is true,
+        given a bit-vector per symbol and the mask of all models.
+        """
+        return self.function(columns, mask)
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    def evaluate(self, model):
+        """Evaluates the sentence in a single model, like Sentence.evaluate."""
+        try:
+            columns = [1 if model[symbol] else 0 for symbol in self.symbols]
+        except KeyError as e:
+            raise Exception(f"variable {e.args[0]} not in model")
+        return bool(self.function(columns, 1))
+
+
+class CNF():
+    """
+    Clauses in conjunctive normal form equisatisfiable with the sentences
+    added, by the Tseitin encoding: every distinct compound subsentence
+    gets a fresh variable whose clauses make it equal to the subsentence,
+    so the clauses grow linearly with the sentences rather than
+    exponentially. Symbols are numbered first by `variable`.
+    """
+
+    def __init__(self):
+        self.variables = {}
+        self.count = 0
+        self.literals = {}
+        self.clauses = []
+
+    def new_variable(self):
+        self.count += 1
+        return self.count
+
+    def variable(self, name):
+        """Returns the variable numbering symbol `name`."""
+        if name not in self.variables:
+            self.variables[name] = self.new_variable()
+        return self.variables[name]
+
+    def literal(self, sentence):
+        """Returns a literal equal to `sentence`, encoding it if new."""
+        sentence = intern(sentence)
+        if sentence not in self.literals:
+            self.literals[sentence] = sentence.tseitin(self)
+        return self.literals[sentence]
+
+    def add(self, sentence):
+        """
+        Adds clauses requiring `sentence` to hold. Conjunctions are split
+        and disjunctions of literals added as they are, without new variables.
+        """
+        Sentence.validate(sentence)
+        sentence = simplify(sentence)
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+
+def check_sat(knowledge, query, stats=None):
+    """
+    Checks entailment with a SAT solver: knowledge entails query exactly
+    when knowledge ∧ ¬query has no model.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    cnf.add(Not(query))
+    solver = Solver(cnf.clauses)
+    satisfiable = solver.solve()
+    record(stats, decisions=solver.stats["decisions"],
+           conflicts=solver.stats["conflicts"])
+    return not satisfiable
+
+
+def record(stats, **counts):
+    """Adds counts to a `stats` dictionary, if there is one."""
+    if stats is not None:
+        for key, count in counts.items():
+            stats[key] = stats.get(key, 0) + count
+
+
+class KnowledgeBase():
+    """
+    Sentences known to be true, answering many entailment queries without
+    starting over for each.
+
+    With method "dpll" the sentences are encoded once into a SAT solver
+    that keeps the clauses it learns, and each query is one more solve
+    assuming it is false. With method "models" the satisfying models are
+    enumerated once, then each query is evaluated in those models only.
+
+    Facts may be added at any time. Entailed queries stay entailed, so
+    only the queries that were not entailed are asked again.
+
+    `evaluated` counts the models sentences were evaluated in, and
+    `solver.stats` the work of the SAT solver.
+    """
+
+    def __init__(self, *sentences, method="dpll"):
+        if method not in ("dpll", "models"):
+            raise ValueError(f"unknown knowledge base method {method}")
+        self.method = method
+        self.answers = {}
+        self.evaluated = 0
+
+        # State for the "dpll" method
+        self.cnf = CNF()
+        self.solver = Solver()
+        self.encoded = 0
+
+        # State for the "models" method, model j giving symbol i bit i of j
+        self.symbols = []
+        self.models = [0]
+        self.columns = None
+
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Adds a sentence to the knowledge."""
+        Sentence.validate(sentence)
+        self.answers = {
+            query: answer for query, answer in self.answers.items() if answer
+        }
+        if self.method == "dpll":
+            self.cnf.add(sentence)
+            self.encode()
+            return
+
+        sentence = simplify(sentence)
+        new = sorted(sentence.symbols() - set(self.symbols))
+        if not new:
+            compiled = Compiled(sentence, self.symbols)
+            true = compiled(self.model_columns(), (1 << len(self.models)) - 1)
+            self.evaluated += len(self.models)
+            self.models = [
+                model for k, model in enumerate(self.models) if true >> k & 1
+            ]
+        else:
+            models = []
+            for model, shift, true in self.extensions(sentence, new):
+                while true:
+                    bit = true & -true
+                    models.append(model | (bit.bit_length() - 1) << shift)
+                    true ^= bit
+            self.models = models
+            self.symbols.extend(new)
+        self.columns = None
+
+    def entails(self, query):
+        """Checks if the knowledge entails `query`."""
+        Sentence.validate(query)
+        query = intern(query)
+        if query not in self.answers:
+            self.answers[query] = self.check(query)
+        return self.answers[query]
+
+    def check(self, query):
+        if self.method == "dpll":
+            literal = self.cnf.literal(query)
+            self.encode()
+            return not self.solver.solve([-literal])
+
+        new = sorted(query.symbols() - set(self.symbols))
+        if not new:
+            mask = (1 << len(self.models)) - 1
+            compiled = Compiled(query, self.symbols)
+            self.evaluated += len(self.models)
+            return compiled(self.model_columns(), mask) == mask
+        mask = (1 << 2 ** min(len(new), CHUNK_BITS)) - 1
+        return all(true == mask for _, _, true in self.extensions(query, new))
+
+    def encode(self):
+        """Passes clauses not yet seen by the solver to it."""
+        for clause in self.cnf.clauses[self.encoded:]:
+            self.solver.add_clause(clause)
+        self.encoded = len(self.cnf.clauses)
+
+    def extensions(self, sentence, new):
+        """
+        Yields (model, shift, true) for chunks of the ways to extend each
+        model with values for the `new` symbols, where `true` is the
+        bit-vector of those extensions in which `sentence` holds, its bit
+        j meaning `model | j << shift`.
+        """
+        compiled = Compiled(sentence, self.symbols + new)
+        bits = min(len(new), CHUNK_BITS)
+        low, mask = model_columns(bits)
+        known = len(self.symbols)
+        for model in self.models:
+            values = [mask if model >> i & 1 else 0 for i in range(known)]
+            for chunk in range(2 ** (len(new) - bits)):
+                high = [
+                    mask if chunk >> i & 1 else 0
+                    for i in range(len(new) - bits)
+                ]
+                true = compiled(values + low + high, mask)
+                self.evaluated += 2 ** bits
+                yield model | chunk << (known + bits), known, true
+
+    def model_columns(self):
+        """
+        Returns a bit-vector per symbol, bit k holding the symbol's value
+        in model k, to evaluate compiled sentences over the models.
+        """
+        if self.columns is None:
+            self.columns = [0] * len(self.symbols)
+            for k, model in enumerate(self.models):
+                for i in range(len(self.symbols)):
+                    if model >> i & 1:
+                        self.columns[i] |= 1 << k
+        return self.columns
+
+
+# Models evaluated together by one call of a compiled sentence
+CHUNK_BITS = 16
+
+
+def model_columns(bits):
+    """
+    Returns a bit-vector over 2 ** bits models for each of `bits` symbols,
+    bit j of column i being bit i of j, and the mask of all those models.
+    """
+    width = 2 ** bits
+    mask = (1 << width) - 1
+    columns = []
+    for i in range(bits):
+
+        # Repeat a block of 2 ** i zeros then 2 ** i ones across the width
+        block = 2 ** (i + 1)
+        repunit = mask // ((1 << block) - 1)
+        ones = ((1 << 2 ** i) - 1) << 2 ** i
+        columns.append(ones * repunit)
+    return columns, mask
+
+
+def check_compiled(knowledge, query, symbols, stats=None):
+    """
+    Checks entailment by evaluating a compiled knowledge => query over
+    chunks of 2 ** CHUNK_BITS models at a time. The low symbols vary
+    inside a chunk, the high ones are fixed per chunk.
+    """
+    symbols = sorted(symbols)
+    bits = min(len(symbols), CHUNK_BITS)
+    compiled = Compiled(Implication(knowledge, query), symbols)
+    low, mask = model_columns(bits)
+    for chunk in range(2 ** (len(symbols) - bits)):
+        high = [
+            mask if chunk >> i & 1 else 0
+            for i in range(len(symbols) - bits)
+        ]
+        record(stats, models=2 ** bits)
+        if compiled(low + high, mask) != mask:
+            return False
+    return True
+
+
+# Tasks per worker in check_parallel, so that workers finishing early
+# take on more of the work
+TASKS_PER_WORKER = 4
+
+# State of a check_parallel worker process, set by init_worker
+worker = {}
+
+
+def check_parallel(knowledge, query, symbols, workers=None, stats=None):
+    """
+    Checks entailment like check_compiled, on a pool of `workers`
+    processes (one per CPU by default). Each task fixes the values of
+    the last few symbols and checks the chunks of models under them.
+    The first counter-model found stops every worker.
+    """
+    symbols = sorted(symbols)
+    workers = workers or os.cpu_count() or 1
+    chunks = 2 ** (len(symbols) - min(len(symbols), CHUNK_BITS))
+    if workers == 1 or chunks == 1:
+        return check_compiled(knowledge, query, symbols, stats)
+
+    # A power of two tasks, each fixing `fixed` symbols
+    fixed = min(
+        (workers * TASKS_PER_WORKER - 1).bit_length(), chunks.bit_length() - 1
+    )
+    size = chunks >> fixed
+    stop = multiprocessing.Event()
+    with ProcessPoolExecutor(
+        workers, initializer=init_worker,
+        initargs=(Implication(knowledge, query), symbols, stop)
+    ) as executor:
+        futures = [
+            executor.submit(check_chunks, task * size, (task + 1) * size)
+            for task in range(2 ** fixed)
+        ]
+        for future in as_completed(futures):
+            holds, models = future.result()
+            record(stats, models=models)
+            if holds is False:
+                stop.set()
+                for pending in futures:
+                    pending.cancel()
+                return False
+    return True
+
+
+def init_worker(sentence, symbols, stop):
+    worker["compiled"] = Compiled(sentence, symbols)
+    worker["columns"] = model_columns(min(len(symbols), CHUNK_BITS))
+    worker["stop"] = stop
+
+
+def check_chunks(start, end):
+    """
+    Returns whether the worker's sentence holds in chunks [start, end)
+    of models, as numbered by check_compiled, or None if stopped early,
+    and the number of models evaluated.
+    """
+    compiled, stop = worker["compiled"], worker["stop"]
+    low, mask = worker["columns"]
+    high_bits = len(compiled.symbols) - len(low)
+    for chunk in range(start, end):
+        if stop.is_set():
+            return None, (chunk - start) << len(low)
+        high = [mask if chunk >> i & 1 else 0 for i in range(high_bits)]
+        if compiled(low + high, mask) != mask:
+            stop.set()
+            return False, (chunk + 1 - start) << len(low)
+    return True, (end - start) << len(low)
+
+
+# Bytes of NumPy arrays a chunk of models may take, counting a column
+# per symbol and a temporary per compiled subsentence
+NUMPY_MEMORY = 2 ** 26
+
+# Bit j of word pattern i is bit i of j, for the 6 symbols varying
+# inside each 64-bit word
+WORD_PATTERNS = [
+    0xAAAAAAAAAAAAAAAA, 0xCCCCCCCCCCCCCCCC, 0xF0F0F0F0F0F0F0F0,
+    0xFF00FF00FF00FF00, 0xFFFF0000FFFF0000, 0xFFFFFFFF00000000,
+]
+
+
+def check_numpy(knowledge, query, symbols, stats=None):
+    """
+    Checks entailment by evaluating a compiled knowledge => query over
+    NumPy arrays of 64-bit words, each word packing 64 models. The
+    first 6 symbols vary inside a word, the next ones across the words of
+    a chunk, and the rest are fixed per chunk, with chunks sized to stay
+    within NUMPY_MEMORY bytes however many symbols there are.
+    """
+    import numpy as np
+
+    symbols = sorted(symbols)
+    compiled = Compiled(Implication(knowledge, query), symbols)
+    inside = min(len(symbols), len(WORD_PATTERNS))
+    mask = np.uint64((1 << 2 ** inside) - 1)
+    low = [np.uint64(pattern) & mask for pattern in WORD_PATTERNS[:inside]]
+
+    # Largest chunk of words whose arrays fit the memory budget
+    words = NUMPY_MEMORY // (8 * (compiled.size + len(symbols)))
+    across = min(len(symbols) - inside, max(words.bit_length() - 1, 0))
+    index = np.arange(2 ** across, dtype=np.uint64)
+    middle = [
+        np.where(index >> np.uint64(i) & np.uint64(1), mask, np.uint64(0))
+        for i in range(across)
+    ]
+
+    fixed = len(symbols) - inside - across
+    for chunk in range(2 ** fixed):
+        high = [
+            mask if chunk >> i & 1 else np.uint64(0)
+            for i in range(fixed)
+        ]
+        result = compiled(low + middle + high, mask)
+        record(stats, models=2 ** (inside + across))
+        if not np.all(result == mask):
+            return False
+    return True
+
+
+def model_check(knowledge, query, method="compiled", workers=None,
+                stats=None):
+    """
+    Checks if knowledge base entails query.
+
+    `method` is "enumerate" to evaluate the sentences model by model,
+    "compiled" to compile them and evaluate many models at once,
+    "numpy" to evaluate them the same way over NumPy arrays,
+    "parallel" to evaluate compiled sentences on `workers` processes, or
+    "dpll" to search for a counter-model with a SAT solver instead of
+    enumerating all 2 ** n models.
+
+    If `stats` is a dictionary, the number of models evaluated is added
+    to stats["models"], and the solver's decisions and conflicts to
+    stats["decisions"] and stats["conflicts"].
+    """
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
 
         # If model has an assignment for each symbol
         if not symbols:
+            record(stats, models=1)
 
             # If knowledge base is true in model, then query must also be true
             if knowledge.evaluate(model):
@@ -259,5 +1006,18 @@ def model_check(knowledge, query):
     # Get all symbols in both knowledge and query
     symbols = set.union(knowledge.symbols(), query.symbols())
 
+    if method != "enumerate":
+        knowledge, query = simplify(knowledge), simplify(query)
+    if method == "compiled":
+        return check_compiled(knowledge, query, symbols, stats)
+    elif method == "parallel":
+        return check_parallel(knowledge, query, symbols, workers, stats)
+    elif method == "numpy":
+        return check_numpy(knowledge, query, symbols, stats)
+    elif method == "dpll":
+        return check_sat(knowledge, query, stats)
+    elif method != "enumerate":
+        raise ValueError(f"unknown model checking method {method}")
+
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
@@ -0,0 +1,284 @@
+import heapq
+
+
+class Solver():
+    """
+    Conflict-driven clause learning SAT solver.
+
+    Clauses are lists of non-zero integers, `v` for variable v and `-v`
+    for its negation, as in the DIMACS format. Unit propagation watches
+    two literals per clause, conflicts are analysed to their first unique
+    implication point to learn a clause and backjump, and decisions pick
+    the most active variable, bumped whenever it takes part in a conflict.
+
+    Clauses may be added between calls to solve, and learned clauses are
+    kept, so one solver can answer many queries under different assumptions.
+    """
+
+    DECAY = 0.95
+    RESTART = 100
+    RESTART_GROWTH = 1.5
+
+    def __init__(self, clauses=()):
+        self.clauses = []
+        self.watches = {}
+        self.units = []
+        self.inconsistent = False
+
+        # Assignment state, all undone by backtracking
+        self.values = {}
+        self.levels = {}
+        self.reasons = {}
+        self.trail = []
+        self.trail_limits = []
+        self.head = 0
+
+        # Decision heuristics
+        self.activity = {}
+        self.increment = 1.0
+        self.order = []
+        self.phase = {}
+
+        self.stats = {
+            "decisions": 0, "propagations": 0, "conflicts": 0,
+            "learned": 0, "restarts": 0,
+        }
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def add_clause(self, clause):
+        """Adds a clause, which must hold in every model from now on."""
+        self.backtrack(0)
+        clause = list(dict.fromkeys(clause))
+        if any(-literal in clause for literal in clause):
+            return
+        for literal in clause:
+            self.add_variable(abs(literal))
+
+        # Simplify by what is already known without any decision
+        if any(self.value(literal) is True for literal in clause):
+            return
+        clause = [literal for literal in clause if self.value(literal) is None]
+        if not clause:
+            self.inconsistent = True
+        elif len(clause) == 1:
+            self.units.append(clause[0])
+        else:
+            self.attach(clause)
+
+    def add_variable(self, variable):
+        if variable not in self.activity:
+            self.activity[variable] = 0.0
+            heapq.heappush(self.order, (0.0, variable))
+
+    def attach(self, clause):
+        """Stores a clause of two or more literals, watching its first two."""
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches.setdefault(clause[0], []).append(index)
+        self.watches.setdefault(clause[1], []).append(index)
+        return index
+
+    def value(self, literal):
+        """Returns True or False for an assigned literal, otherwise None."""
+        value = self.values.get(abs(literal))
+        if value is None:
+            return None
+        return value if literal > 0 else not value
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.values[variable] = literal > 0
+        self.levels[variable] = len(self.trail_limits)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal implied by unit clauses.
+        Returns the index of a clause made false, or None.
+        """
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            self.stats["propagations"] += 1
+            watchers = self.watches.get(false, [])
+            kept = []
+            conflict = None
+            for position, index in enumerate(watchers):
+                clause = self.clauses[index]
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], clause[0]
+
+                # Satisfied by the other watched literal
+                if self.value(clause[0]) is True:
+                    kept.append(index)
+                    continue
+
+                # Move the watch to any literal that is not false
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches.setdefault(clause[1], []).append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if self.value(clause[0]) is False:
+                        conflict = index
+                        kept.extend(watchers[position + 1:])
+                        break
+                    self.assign(clause[0], index)
+            self.watches[false] = kept
+            if conflict is not None:
+                return conflict
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the clause learned from a conflict, its asserting literal
+        first, and the level to backjump to.
+        """
+        level = len(self.trail_limits)
+        learned = [None]
+        seen = set()
+        pending = 0
+        literal = None
+        position = len(self.trail) - 1
+        clause = self.clauses[conflict]
+        while True:
+            for other in clause:
+                variable = abs(other)
+                if other == literal or variable in seen:
+                    continue
+                if self.levels[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.bump(variable)
+                if self.levels[variable] == level:
+                    pending += 1
+                else:
+                    learned.append(other)
+
+            # Resolve on the latest assigned literal of this level
+            while abs(self.trail[position]) not in seen:
+                position -= 1
+            literal = self.trail[position]
+            position -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reasons[abs(literal)]]
+
+        learned[0] = -literal
+        if len(learned) == 1:
+            return learned, 0
+
+        # Watch the literal of the highest remaining level second
+        deepest = max(
+            range(1, len(learned)), key=lambda i: self.levels[abs(learned[i])]
+        )
+        learned[1], learned[deepest] = learned[deepest], learned[1]
+        return learned, self.levels[abs(learned[1])]
+
+    def bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            for other in self.activity:
+                self.activity[other] *= 1e-100
+            self.increment *= 1e-100
+            self.order = [(-a, v) for v, a in self.activity.items()]
+            heapq.heapify(self.order)
+        else:
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+
+    def backtrack(self, level):
+        """Undoes every assignment made above decision `level`."""
+        if len(self.trail_limits) <= level:
+            return
+        start = self.trail_limits[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phase[variable] = literal > 0
+            del self.values[variable]
+            del self.reasons[variable]
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.head = min(self.head, start)
+
+    def decide(self):
+        """Returns the unassigned variable with the highest activity, or None."""
+        while self.order:
+            _, variable = heapq.heappop(self.order)
+            if variable not in self.values:
+                return variable
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses and assumed literals can all hold,
+        leaving a satisfying assignment in `values`, otherwise False.
+        """
+        if self.inconsistent:
+            return False
+        self.backtrack(0)
+        for unit in self.units:
+            if self.value(unit) is False:
+                self.inconsistent = True
+                return False
+            if self.value(unit) is None:
+                self.assign(unit, None)
+        self.units = []
+        for literal in assumptions:
+            self.add_variable(abs(literal))
+
+        conflicts = 0
+        limit = self.RESTART
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.stats["conflicts"] += 1
+                conflicts += 1
+                if not self.trail_limits:
+                    self.inconsistent = True
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.stats["learned"] += 1
+                    self.assign(learned[0], self.attach(learned))
+                self.increment /= self.DECAY
+                continue
+
+            if conflicts >= limit:
+                self.stats["restarts"] += 1
+                conflicts = 0
+                limit *= self.RESTART_GROWTH
+                self.backtrack(0)
+                continue
+
+            # Assumptions are decided first, one per level
+            level = len(self.trail_limits)
+            if level < len(assumptions):
+                literal = assumptions[level]
+                if self.value(literal) is False:
+                    self.backtrack(0)
+                    return False
+                self.trail_limits.append(len(self.trail))
+                if self.value(literal) is None:
+                    self.assign(literal, None)
+                continue
+
+            variable = self.decide()
+            if variable is None:
+                return True
+            self.stats["decisions"] += 1
+            self.trail_limits.append(len(self.trail))
+            phase = self.phase.get(variable, False)
+            self.assign(variable if phase else -variable, None)
+
+    def model(self):
+        """Returns the current assignment as a dictionary of variables."""
+        return dict(self.values)
@@ -0,0 +1,271 @@
+import itertools
+import pickle
+import random
+
+import pytest
+
+from generate import generate_puzzle, random_statement
+from logic import *
+from sat import Solver
+
+SEED = 0
+SYMBOLS = [Symbol(name) for name in "ABCDE"]
+
+
+def random_sentence(rng, depth, symbols=SYMBOLS):
+    """
+    Returns a random sentence over `symbols` nested up to `depth` deep,
+    using every connective and now and then an empty And() or Or().
+    """
+    if depth <= 1:
+        return rng.choice(symbols)
+    kind = rng.randrange(7)
+    if kind == 0:
+        return Not(random_sentence(rng, depth - 1, symbols))
+    elif kind == 1:
+        return Implication(
+            random_sentence(rng, depth - 1, symbols),
+            random_sentence(rng, depth - 1, symbols)
+        )
+    elif kind == 2:
+        return Biconditional(
+            random_sentence(rng, depth - 1, symbols),
+            random_sentence(rng, depth - 1, symbols)
+        )
+    operands = [
+        random_sentence(rng, depth - 1, symbols)
+        for _ in range(rng.randrange(4))
+    ]
+    return And(*operands) if kind in (3, 4) else Or(*operands)
+
+
+def all_models(names):
+    """
+    Yields every model over the symbol `names`, as a dictionary.
+    """
+    names = sorted(names)
+    for values in itertools.product((False, True), repeat=len(names)):
+        yield dict(zip(names, values))
+
+
+def test_compiled_matches_evaluate():
+    rng = random.Random(SEED)
+    names = [symbol.name for symbol in SYMBOLS]
+    models = list(all_models(names))
+    for _ in range(300):
+        sentence = random_sentence(rng, 4)
+        compiled = Compiled(sentence, names)
+        expected = [sentence.evaluate(model) for model in models]
+        assert [compiled.evaluate(model) for model in models] == expected
+
+        # Bit j of each column holds the symbol's value in model j
+        columns = [
+            sum(model[name] << j for j, model in enumerate(models))
+            for name in names
+        ]
+        true = compiled(columns, (1 << len(models)) - 1)
+        assert [bool(true >> j & 1) for j in range(len(models))] == expected
+
+
+def random_clauses(rng, variables, count, width=3):
+    return [
+        [rng.choice((1, -1)) * rng.randint(1, variables)
+         for _ in range(rng.randint(1, width))]
+        for _ in range(count)
+    ]
+
+
+def satisfiable(clauses, variables, assumptions=()):
+    for values in itertools.product((False, True), repeat=variables):
+        def holds(literal):
+            return values[abs(literal) - 1] == (literal > 0)
+        if (all(holds(literal) for literal in assumptions)
+                and all(any(map(holds, clause)) for clause in clauses)):
+            return True
+    return False
+
+
+def test_solver_matches_brute_force():
+    rng = random.Random(SEED)
+    for _ in range(300):
+        variables = rng.randint(1, 8)
+        clauses = random_clauses(rng, variables, rng.randint(1, 40))
+        solver = Solver(clauses)
+        result = solver.solve()
+        assert result == satisfiable(clauses, variables)
+        if result:
+            # Variables only in clauses always true may be left unassigned
+            model = solver.model()
+            for clause in clauses:
+                if any(-literal in clause for literal in clause):
+                    continue
+                assert any(
+                    model[abs(literal)] == (literal > 0) for literal in clause
+                )
+
+
+def test_solver_answers_many_queries():
+    # Clauses added between solves and assumptions share one solver
+    rng = random.Random(SEED)
+    for _ in range(50):
+        variables = 8
+        clauses = random_clauses(rng, variables, 10)
+        solver = Solver(clauses)
+        for _ in range(10):
+            assumptions = [
+                rng.choice((1, -1)) * variable
+                for variable in rng.sample(range(1, variables + 1), 2)
+            ]
+            assert solver.solve(assumptions) == satisfiable(
+                clauses, variables, assumptions
+            )
+            clause = random_clauses(rng, variables, 1)[0]
+            solver.add_clause(clause)
+            clauses.append(clause)
+        assert solver.solve() == satisfiable(clauses, variables)
+
+
+def test_sat_entailment_matches_enumeration():
+    rng = random.Random(SEED)
+    for _ in range(300):
+        knowledge = And(*[random_sentence(rng, 3) for _ in range(3)])
+        query = random_sentence(rng, 3)
+        stats = {}
+        assert model_check(knowledge, query, "dpll", stats=stats) == (
+            model_check(knowledge, query, "enumerate")
+        )
+        assert "conflicts" in stats
+
+
+@pytest.mark.parametrize("memory", [None, 2 ** 10])
+def test_numpy_matches_enumeration(monkeypatch, memory):
+    # A small memory budget splits the models into several chunks
+    if memory is not None:
+        import logic
+        monkeypatch.setattr(logic, "NUMPY_MEMORY", memory)
+    rng = random.Random(SEED)
+    symbols = [Symbol(f"S{i}") for i in range(10)]
+    for symbol_count in (1, 3, 6, 7, 10):
+        for _ in range(30):
+            knowledge = And(*[
+                random_sentence(rng, 3, symbols[:symbol_count])
+                for _ in range(3)
+            ])
+            query = random_sentence(rng, 2, symbols[:symbol_count])
+            assert model_check(knowledge, query, "numpy") == (
+                model_check(knowledge, query, "enumerate")
+            )
+
+
+@pytest.mark.parametrize("method", ["dpll", "models"])
+def test_knowledge_base_matches_enumeration(method):
+    rng = random.Random(SEED)
+    for _ in range(40):
+        knowledge_base = KnowledgeBase(method=method)
+        facts = []
+        queries = [random_sentence(rng, 3) for _ in range(6)] + SYMBOLS
+        for _ in range(4):
+            fact = random_sentence(rng, 3, SYMBOLS[:rng.randint(1, 5)])
+            knowledge_base.add(fact)
+            facts.append(fact)
+            for query in queries:
+                assert knowledge_base.entails(query) == model_check(
+                    And(*facts), query, "enumerate"
+                )
+
+
+@pytest.mark.parametrize("method", ["dpll", "models"])
+def test_knowledge_base_solves_puzzles(method):
+    import puzzle
+    solutions = [
+        {"A is a Knave"},
+        {"A is a Knave", "B is a Knight"},
+        {"A is a Knave", "B is a Knight"},
+        {"A is a Knight", "B is a Knave", "C is a Knight"},
+    ]
+    for knowledge, solution in zip(
+        (puzzle.knowledge0, puzzle.knowledge1, puzzle.knowledge2,
+         puzzle.knowledge3),
+        solutions
+    ):
+        knowledge_base = KnowledgeBase(knowledge, method=method)
+        assert {
+            symbol.name for symbol in puzzle.symbols
+            if knowledge_base.entails(symbol)
+        } == solution
+
+
+def test_simplify_keeps_meaning():
+    rng = random.Random(SEED)
+    names = [symbol.name for symbol in SYMBOLS]
+    for _ in range(300):
+        sentence = random_sentence(rng, 5)
+        simplified = simplify(sentence)
+        assert simplified.interned
+        assert node_counts(simplified)[0] <= node_counts(sentence)[0]
+        for model in all_models(names):
+            assert simplified.evaluate(model) == sentence.evaluate(model)
+
+
+def test_interned_sentences_are_shared():
+    a, b = Symbol("A"), Symbol("B")
+    first = intern(And(Or(a, Not(b)), Or(a, Not(b))))
+    second = intern(And(Or(Symbol("A"), Not(Symbol("B"))),
+                        Or(a, Not(b))))
+    assert first is second
+    assert first.conjuncts[0] is first.conjuncts[1]
+    assert node_counts(first) == (9, 5)
+    assert first.symbols() == {"A", "B"}
+    with pytest.raises(TypeError):
+        first.add(a)
+    assert intern(pickle.loads(pickle.dumps(first))) is first
+
+    assert simplify(Not(Not(a))) is intern(a)
+    assert simplify(And(a, Not(a))) == Or()
+    assert simplify(Or(a, Or(b, a))) is intern(Or(a, b))
+    assert simplify(Implication(And(), a)) is intern(a)
+
+
+def test_parallel_matches_other_methods():
+    # Over CHUNK_BITS symbols, so that the models are split among tasks
+    rng = random.Random(SEED)
+    knowledge, symbols = generate_puzzle(rng, 9)
+    for query in symbols[:3] + symbols[-3:] + [Or(symbols[0], symbols[1])]:
+        stats = {}
+        expected = model_check(knowledge, query, "dpll")
+        assert model_check(knowledge, query, "compiled") == expected
+        assert model_check(
+            knowledge, query, "parallel", workers=2, stats=stats
+        ) == expected
+        if expected:
+            assert stats["models"] == 2 ** len(symbols)
+
+
+def depth(sentence):
+    return 1 + max((depth(operand) for operand in sentence.operands()),
+                   default=0)
+
+
+def test_generated_puzzles_are_solvable():
+    rng = random.Random(SEED)
+    for people in (1, 2, 3, 4):
+        for _ in range(10):
+            knowledge, symbols = generate_puzzle(rng, people, 3)
+            assert len(symbols) == 2 * people
+
+            # A puzzle always has a solution, so it does not entail false
+            assert not model_check(knowledge, Or(), "enumerate")
+            knowledge_base = KnowledgeBase(knowledge)
+            for symbol in symbols:
+                assert knowledge_base.entails(symbol) == model_check(
+                    knowledge, symbol, "enumerate"
+                )
+
+    assert repr(generate_puzzle(random.Random(1), 5)) == (
+        repr(generate_puzzle(random.Random(1), 5))
+    )
+    knights = [Symbol(f"{i} is a Knight") for i in range(3)]
+    knaves = [Symbol(f"{i} is a Knave") for i in range(3)]
+    for _ in range(100):
+        statement = random_statement(rng, knights, knaves, 3)
+        assert depth(statement) <= 3
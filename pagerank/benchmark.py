@@ -0,0 +1,197 @@
+import csv
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from crawler import crawl_graph
+from edgefile import EdgeFile, stream_pagerank, write_edge_file
+from generate import MODELS, write_html
+from graph import LinkGraph
+from incremental import propagate
+from pagerank import crawl, iterate_pagerank, sample_pagerank
+from sampling import sample_batches, sample_parallel
+from solvers import SOLVERS, TOLERANCE, power_iteration
+
+DAMPING = 0.85
+SEED = 0
+OUTPUT = "benchmark.csv"
+
+# Pages in the graphs benchmarked, up to the largest asked for
+PAGES = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7)
+LARGEST = 10 ** 6
+
+# Pages drawn by the sampling tasks, and links added to the graph
+# before an incremental update
+SAMPLES = 10 ** 6
+CHANGES = 100
+
+# Most samples drawn by parallel sampling, which stops early once the
+# widest 95% confidence interval of a page's rank is within HALF_WIDTH
+PARALLEL_SAMPLES = 10 ** 8
+HALF_WIDTH = 2e-4
+
+# Tolerance of the reference solution each task is compared with
+REFERENCE_TOLERANCE = 1e-13
+
+# Tasks timed and the most pages each is run on, as some keep the graph
+# in Python dictionaries or files on disk, or are slow on large graphs
+LIMITS = {
+    "crawl": 10 ** 5, "crawl_graph": 10 ** 5,
+    "sample-walk": 10 ** 5, "sample-batch": None, "sample-parallel": None,
+    "iterate": 10 ** 6, "power": None, "gauss-seidel": 10 ** 6,
+    "aitken": None, "quadratic": None, "adaptive": None,
+    "stream": None, "incremental": None,
+}
+
+FIELDS = (
+    "model", "pages", "links", "task", "iterations", "seconds", "error",
+)
+
+
+def main():
+    if len(sys.argv) > 4:
+        sys.exit("Usage: python benchmark.py [largest] [model] [output]")
+    largest = int(float(sys.argv[1])) if len(sys.argv) >= 2 else LARGEST
+    model = sys.argv[2] if len(sys.argv) >= 3 else "power-law"
+    output = sys.argv[3] if len(sys.argv) == 4 else OUTPUT
+    if model not in MODELS:
+        sys.exit(f"Unknown model {model}")
+    rng = np.random.default_rng(SEED)
+
+    rows = []
+    print(f"{model} graphs, solved to an L1 tolerance of {TOLERANCE}")
+    print(f"{'pages':>9} {'links':>10} {'task':>15} {'iterations':>10} "
+          f"{'seconds':>9} {'error':>9}")
+    for pages in PAGES:
+        if pages > largest:
+            break
+        start = time.perf_counter()
+        graph = MODELS[model](rng, pages)
+        print(f"{pages:>9} {graph.edges_count:>10} {'generate':>15} "
+              f"{'':>10} {time.perf_counter() - start:>9.3f}")
+        with tempfile.TemporaryDirectory() as directory:
+            for row in benchmark_graph(graph, directory, rng):
+                row["model"] = model
+                rows.append(row)
+                error = "" if row["error"] is None else f"{row['error']:.1e}"
+                print(f"{pages:>9} {row['links']:>10} {row['task']:>15} "
+                      f"{row['iterations']:>10} {row['seconds']:>9.3f} "
+                      f"{error:>9}")
+
+    with open(output, "w", newline="") as f:
+        writer = csv.DictWriter(f, FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Results written to {output}.")
+
+
+def benchmark_graph(graph, directory, rng):
+    """
+    Yields a row of results for every task run on a LinkGraph, writing
+    it to `directory` as HTML pages and as an edge file for the tasks
+    that read it from disk. Errors are L1 distances from a reference
+    solution, and None for the crawls.
+    """
+    reference = power_iteration(graph, DAMPING, tolerance=REFERENCE_TOLERANCE)
+    inputs = {"graph": graph, "rng": rng}
+    tasks = [
+        task for task, limit in LIMITS.items()
+        if limit is None or len(graph) <= limit
+    ]
+    if {"crawl", "crawl_graph"} & set(tasks):
+        inputs["html"] = os.path.join(directory, "html")
+        write_html(inputs["html"], graph)
+    if {"sample-walk", "iterate"} & set(tasks):
+        offsets, targets = graph.out_links()
+        inputs["corpus"] = {
+            name: {graph.names[link] for link in targets[start:stop]}
+            for name, start, stop in zip(graph.names, offsets, offsets[1:])
+        }
+    if "stream" in tasks:
+        inputs["edges"] = os.path.join(directory, "edges")
+        write_edge_file(inputs["edges"], graph)
+
+    for task in tasks:
+        stats = {}
+        start = time.perf_counter()
+        rank = run(task, inputs, stats)
+        seconds = stats.get("seconds", time.perf_counter() - start)
+        if isinstance(rank, dict):
+            rank = np.array([rank[name] for name in graph.names])
+        yield {
+            "pages": len(graph),
+            "links": graph.edges_count,
+            "task": task,
+            "iterations": stats.get("iterations", ""),
+            "seconds": seconds,
+            "error": (
+                None if rank is None
+                else float(np.abs(rank - reference).sum())
+            ),
+        }
+
+
+def run(task, inputs, stats):
+    """
+    Runs a task on `inputs`, returning the ranks it computes, as an array
+    or a dictionary by page name, or None for a crawl. Solvers store
+    their iterations in `stats`, and tasks that time only part of their
+    work store its seconds there too.
+    """
+    graph = inputs["graph"]
+    if task == "crawl":
+        crawl(inputs["html"])
+    elif task == "crawl_graph":
+        crawl_graph(inputs["html"])
+    elif task == "sample-walk":
+        return sample_pagerank(inputs["corpus"], DAMPING, SAMPLES)
+    elif task == "sample-batch":
+        return sample_batches(graph, DAMPING, SAMPLES, inputs["rng"])
+    elif task == "sample-parallel":
+        rank = sample_parallel(
+            graph, DAMPING, PARALLEL_SAMPLES, HALF_WIDTH, seed=SEED,
+            stats=stats
+        )
+        stats["iterations"] = stats["rounds"]
+        return rank
+    elif task == "iterate":
+        return iterate_pagerank(inputs["corpus"], DAMPING)
+    elif task in SOLVERS:
+        return SOLVERS[task](graph, DAMPING, stats=stats)
+    elif task == "stream":
+        return stream_pagerank(EdgeFile(inputs["edges"]), DAMPING, stats=stats)
+    elif task == "incremental":
+        return update_after_changes(graph, inputs["rng"], stats)
+    else:
+        raise ValueError(f"unknown task {task}")
+    return None
+
+
+def update_after_changes(graph, rng, stats):
+    """
+    Returns the ranks of `graph` updated incrementally from those of the
+    graph without CHANGES of its links, picked at random. Only the update
+    is timed, and its seconds stored in `stats`.
+    """
+    sources, targets = graph.edges()
+    keep = np.ones(len(sources), dtype=bool)
+    removed = min(CHANGES, len(sources))
+    keep[rng.choice(len(sources), removed, replace=False)] = False
+    before = LinkGraph.from_edges(
+        len(graph), sources[keep], targets[keep], graph.names
+    )
+    rank = power_iteration(before, DAMPING)
+    graph.out_links()
+
+    start = time.perf_counter()
+    rank = propagate(graph, rank, DAMPING, stats=stats)
+    stats["iterations"] = stats["rounds"]
+    stats["seconds"] = time.perf_counter() - start
+    return rank
+
+
+if __name__ == "__main__":
+    main()
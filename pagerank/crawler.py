@@ -0,0 +1,180 @@
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from graph import INDEX, LinkGraph
+from solvers import power_iteration
+
+LINK = re.compile(rb"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# The start of a link cut off at the end of the bytes read so far, which
+# the next bytes may complete
+PARTIAL_LINK = re.compile(
+    rb"<(?:a(?:\s+(?:[^>]*|[^>]*?href=\"[^\"]*))?)?\Z"
+)
+
+# Bytes read from a file at a time, files per task, and how many tasks
+# per worker may be in flight
+READ_SIZE = 2 ** 16
+BATCH = 256
+BATCHES_PER_WORKER = 2
+
+# Longest unfinished tag carried over from one read to the next
+MAX_TAG = 2 ** 12
+
+TOP = 10
+
+# State of a crawler worker, set by init_worker
+worker = {}
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python crawler.py corpus [workers]")
+    workers = int(sys.argv[2]) if len(sys.argv) == 3 else None
+    stats = {}
+    graph = crawl_graph(sys.argv[1], workers, stats=stats)
+    print_crawl_stats(stats)
+
+    rank = power_iteration(graph, 0.85)
+    print(f"Top {min(TOP, len(graph))} of {len(graph)} pages")
+    for i in np.argsort(-rank, kind="stable")[:TOP]:
+        print(f"  {graph.names[i]}: {rank[i]:.4f}")
+
+
+def crawl_graph(directory, workers=None, pool="process", stats=None):
+    """
+    Returns the LinkGraph of the HTML pages in `directory`, with the same
+    pages and links as crawl.
+
+    Pages are numbered in sorted order. Files are read in blocks of
+    READ_SIZE bytes in batches of BATCH files on a `pool` of `workers`
+    processes or threads, one per CPU by default, which return their
+    links as arrays of page numbers rather than strings.
+
+    If `stats` is a dictionary, "files", "bytes", "links" and "seconds"
+    are stored in it.
+    """
+    start = time.perf_counter()
+    names = sorted(
+        entry.name for entry in os.scandir(directory)
+        if entry.name.endswith(".html")
+    )
+    index = {name.encode("utf-8"): i for i, name in enumerate(names)}
+    workers = workers or os.cpu_count() or 1
+    if pool == "process":
+        executor = ProcessPoolExecutor(
+            workers, initializer=init_worker, initargs=(directory, index)
+        )
+    elif pool == "thread":
+        init_worker(directory, index)
+        executor = ThreadPoolExecutor(workers)
+    else:
+        raise ValueError(f"unknown pool {pool}")
+
+    sources, targets = [], []
+    size = 0
+    with executor:
+        for batch_sources, batch_targets, batch_bytes in extract_all(
+            executor, names, workers
+        ):
+            sources.append(batch_sources)
+            targets.append(batch_targets)
+            size += batch_bytes
+
+    sources = np.concatenate(sources) if sources else np.zeros(0, INDEX)
+    targets = np.concatenate(targets) if targets else np.zeros(0, INDEX)
+    graph = LinkGraph.from_edges(len(names), sources, targets, names)
+    if stats is not None:
+        stats["files"] = len(names)
+        stats["bytes"] = size
+        stats["links"] = graph.edges_count
+        stats["seconds"] = time.perf_counter() - start
+    return graph
+
+
+def extract_all(executor, names, workers):
+    """
+    Yields the results of extract_batch for batches of page numbers
+    covering `names`, keeping a bounded window of batches in flight.
+    """
+    pending = []
+    for first in range(0, len(names), BATCH):
+        batch = range(first, min(first + BATCH, len(names)))
+        pending.append(executor.submit(extract_batch, batch))
+        if len(pending) >= BATCHES_PER_WORKER * workers:
+            yield pending.pop(0).result()
+    for future in pending:
+        yield future.result()
+
+
+def init_worker(directory, index):
+    worker["directory"] = directory
+    worker["index"] = index
+    worker["names"] = list(index)
+
+
+def extract_batch(pages):
+    """
+    Returns (sources, targets) arrays of the links between pages of the
+    corpus found in the pages numbered `pages`, and the bytes read.
+    """
+    index, names = worker["index"], worker["names"]
+    sources, targets = [], []
+    size = 0
+    for page in pages:
+        path = os.path.join(worker["directory"], names[page].decode("utf-8"))
+        links = set()
+        for link in extract_links(path):
+            target = index.get(link)
+            if target is not None:
+                links.add(target)
+        links.discard(page)
+        sources.extend([page] * len(links))
+        targets.extend(links)
+        size += os.path.getsize(path)
+    return np.array(sources, INDEX), np.array(targets, INDEX), size
+
+
+def extract_links(path):
+    """
+    Yields the href of every link in the HTML file at `path` as bytes,
+    reading READ_SIZE bytes at a time. A link cut off at the end of a
+    block is carried over to the next, if it starts within MAX_TAG bytes
+    of the end.
+    """
+    carry = b""
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(READ_SIZE)
+            data = carry + block
+            end = 0
+            for match in LINK.finditer(data):
+                yield match.group(1)
+                end = match.end()
+            if not block:
+                return
+
+            # Carry from the first place after the last link where one may
+            # still start, not the last "<", which may be inside a value
+            partial = PARTIAL_LINK.search(data, max(end, len(data) - MAX_TAG))
+            carry = data[partial.start():] if partial else b""
+
+
+def print_crawl_stats(stats):
+    """
+    Prints files, megabytes and links per second for a crawl.
+    """
+    seconds = max(stats["seconds"], 1e-9)
+    print(f"Crawled {stats['files']} files ({stats['bytes'] / 2 ** 20:.1f} MB, "
+          f"{stats['links']} links) in {seconds:.3f} seconds: "
+          f"{stats['files'] / seconds:.0f} files/sec, "
+          f"{stats['bytes'] / 2 ** 20 / seconds:.1f} MB/sec")
+
+
+if __name__ == "__main__":
+    main()
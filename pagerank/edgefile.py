@@ -0,0 +1,155 @@
+import sys
+
+import numpy as np
+
+from crawler import crawl_graph
+from graph import INDEX, OFFSET
+from solvers import MAX_ITERATIONS, TOLERANCE
+
+# An edge file starts with MAGIC and the numbers of pages and links as
+# OFFSET, followed by the out-degree of every page and then a (target,
+# source) pair for every link sorted by target, all as INDEX
+MAGIC = b"PRLINKS1"
+HEADER = len(MAGIC) + 2 * np.dtype(OFFSET).itemsize
+
+# Links read from the file at a time
+CHUNK = 2 ** 22
+
+
+def main():
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python edgefile.py corpus edges")
+    graph = crawl_graph(sys.argv[1])
+    write_edge_file(sys.argv[2], graph)
+    print(f"Wrote {len(graph)} pages and {graph.edges_count} links "
+          f"to {sys.argv[2]}.")
+
+
+def write_edge_file(path, graph):
+    """
+    Writes a LinkGraph to an edge file at `path`, and its page names, one
+    per line, to `path` + ".names".
+    """
+    _, targets = graph.edges()
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        np.array([len(graph), graph.edges_count], dtype=OFFSET).tofile(f)
+        graph.out_degrees.astype(INDEX).tofile(f)
+        for start in range(0, graph.edges_count, CHUNK):
+            stop = start + CHUNK
+            np.column_stack(
+                [targets[start:stop], graph.sources[start:stop]]
+            ).astype(INDEX).tofile(f)
+    with open(path + ".names", "w", encoding="utf-8") as f:
+        for name in graph.names:
+            f.write(f"{name}\n")
+
+
+class EdgeFile():
+    """
+    A link graph in an edge file, memory-mapped rather than read, so that
+    only the parts in use need to be in memory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not an edge file")
+            self.size, self.edges_count = (
+                int(value) for value in np.fromfile(f, dtype=OFFSET, count=2)
+            )
+        self.out_degrees = np.memmap(
+            path, dtype=INDEX, mode="r", offset=HEADER, shape=(self.size,)
+        )
+        self.edges_offset = HEADER + self.size * np.dtype(INDEX).itemsize
+
+    def __len__(self):
+        return self.size
+
+    def chunks(self, size=CHUNK):
+        """
+        Yields (targets, sources) arrays of at most `size` links at a time,
+        in order, mapping the file afresh so that pages already read can
+        be dropped from memory.
+        """
+        if not self.edges_count:
+            return
+        edges = np.memmap(
+            self.path, dtype=INDEX, mode="r", offset=self.edges_offset,
+            shape=(self.edges_count, 2)
+        )
+        for start in range(0, self.edges_count, size):
+            chunk = np.asarray(edges[start:start + size])
+            yield chunk[:, 0], chunk[:, 1]
+
+    def names(self, pages):
+        """
+        Returns the names of the pages numbered `pages`, reading only as
+        far into the names file as needed. Pages are named by number if
+        there is no names file.
+        """
+        wanted = {int(page): None for page in pages}
+        try:
+            with open(self.path + ".names", encoding="utf-8") as f:
+                last = max(wanted, default=-1)
+                for i, line in enumerate(f):
+                    if i in wanted:
+                        wanted[i] = line.rstrip("\n")
+                    if i >= last:
+                        break
+        except FileNotFoundError:
+            pass
+        return [
+            str(page) if wanted[int(page)] is None else wanted[int(page)]
+            for page in pages
+        ]
+
+
+def stream_pagerank(edges, damping, tolerance=TOLERANCE, chunk=CHUNK,
+                    stats=None):
+    """
+    Returns the PageRank vector of an EdgeFile as power_iteration does,
+    streaming the links from the file `chunk` at a time on every
+    iteration. Only vectors of a float per page are kept in memory.
+
+    Links are sorted by target, so each chunk adds to a run of pages
+    and its sums need only as many entries as that run is long.
+
+    If `stats` is a dictionary, the number of iterations, the final L1
+    change and the bytes of links read are stored in stats["iterations"],
+    stats["residual"] and stats["bytes"].
+    """
+    n = len(edges)
+    rank = np.full(n, 1 / n)
+    inverse = np.zeros(n)
+    np.divide(1, edges.out_degrees, out=inverse, where=edges.out_degrees > 0)
+
+    residual = float("inf")
+    iterations = 0
+    while residual >= tolerance and iterations < MAX_ITERATIONS:
+        spread = (1 - damping + damping * rank[inverse == 0].sum()) / n
+        scaled = rank * inverse
+        new_rank = np.zeros(n)
+        for targets, sources in edges.chunks(chunk):
+            first = targets[0]
+            new_rank[first:targets[-1] + 1] += np.bincount(
+                targets - first, weights=scaled[sources]
+            )
+        new_rank *= damping
+        new_rank += spread
+        residual = np.abs(new_rank - rank).sum()
+        rank = new_rank
+        iterations += 1
+
+    if stats is not None:
+        stats["iterations"] = iterations
+        stats["residual"] = float(residual)
+        stats["bytes"] = (
+            iterations * edges.edges_count * 2 * np.dtype(INDEX).itemsize
+        )
+    return rank
+
+
+if __name__ == "__main__":
+    main()
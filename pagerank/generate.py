@@ -0,0 +1,166 @@
+import os
+import sys
+
+import numpy as np
+
+from edgefile import write_edge_file
+from graph import INDEX, LinkGraph
+
+# Mean links from a page, the exponent of the power laws followed by the
+# numbers of links to and from pages, and the share of pages without links
+DEGREE = 8
+EXPONENT = 2.1
+DANGLING = 0.2
+
+# Pages per site, numbered consecutively, and the share of links that
+# stay within their site
+SITE = 1000
+LOCAL = 0.9
+
+# Share of links of a preferential attachment graph to a page picked
+# uniformly rather than by its links, and pages added at a time
+UNIFORM = 0.2
+ATTACH_BATCH = 256
+
+# Links generated at a time
+CHUNK = 2 ** 22
+
+SEED = 0
+
+# Pages written by write_html, laid out as in the example corpora
+HEADER = """<!DOCTYPE html>
+<html lang="en">
+    <head>
+        <title>{name}</title>
+    </head>
+    <body>
+        <h1>{name}</h1>
+
+        <div>Links:</div>
+        <ul>
+"""
+LINK = """            <li><a href="{file}">{name}</a></li>\n"""
+FOOTER = """        </ul>
+    </body>
+</html>
+"""
+
+
+def main():
+    if len(sys.argv) not in (4, 5):
+        sys.exit("Usage: python generate.py power-law|attachment pages "
+                 "directory/|edges [seed]")
+    model, pages, output = sys.argv[1], int(float(sys.argv[2])), sys.argv[3]
+    seed = int(sys.argv[4]) if len(sys.argv) == 5 else SEED
+    if model not in MODELS:
+        sys.exit(f"Unknown model {model}")
+    graph = MODELS[model](np.random.default_rng(seed), pages)
+    if os.path.isdir(output) or output.endswith(os.sep):
+        write_html(output, graph)
+    else:
+        write_edge_file(output, graph)
+    print(f"Wrote {len(graph)} pages and {graph.edges_count} links "
+          f"to {output}.")
+
+
+def power_law_graph(rng, n, degree=DEGREE, exponent=EXPONENT,
+                    dangling=DANGLING, site=SITE, local=LOCAL):
+    """
+    Returns a LinkGraph of `n` pages like a crawl of the web, from a NumPy
+    Generator `rng`. A `dangling` share of pages has no links, and the
+    rest link to 1 or more pages, `degree` on average, with a power law
+    tail of `exponent`. Each page has a popularity from a power law of
+    the same exponent, and links pick their target by popularity, a
+    `local` share of them among the pages of their own site.
+    """
+    shape = exponent - 1
+    out_degrees = 1 + (
+        rng.pareto(shape, n) * (degree - 1) * (shape - 1)
+    ).astype(np.int64)
+    out_degrees[rng.random(n) < dangling] = 0
+    np.minimum(out_degrees, n - 1, out=out_degrees)
+    sources = np.repeat(np.arange(n, dtype=INDEX), out_degrees)
+
+    # Pick targets by inverting the cumulative popularity, over the
+    # whole graph or over the source's site
+    popularity = np.cumsum(rng.pareto(shape, n) + 1)
+    popularity = np.concatenate([[0], popularity])
+    targets = np.empty(len(sources), dtype=INDEX)
+    for start in range(0, len(sources), CHUNK):
+        chunk = sources[start:start + CHUNK]
+        low = np.zeros(len(chunk))
+        high = np.full(len(chunk), popularity[-1])
+        within = rng.random(len(chunk)) < local
+        first = chunk[within] // site * site
+        low[within] = popularity[first]
+        high[within] = popularity[np.minimum(first + site, n)]
+        picked = np.searchsorted(
+            popularity, low + rng.random(len(chunk)) * (high - low), "right"
+        ) - 1
+        targets[start:start + CHUNK] = np.clip(picked, 0, n - 1)
+    return LinkGraph.from_edges(n, sources, targets)
+
+
+def attachment_graph(rng, n, degree=DEGREE, dangling=DANGLING,
+                     uniform=UNIFORM):
+    """
+    Returns a LinkGraph of `n` pages grown by preferential attachment,
+    from a NumPy Generator `rng`. Pages are added in order, and a
+    `dangling` share of them has no links. The rest link to `degree`
+    earlier pages on average, each picked uniformly with probability
+    `uniform` and otherwise as the target of a random earlier link, so
+    in proportion to the links it already has. Pages are added
+    ATTACH_BATCH at a time, linking only to pages added before them
+    when copying a link.
+    """
+    out_degrees = 1 + rng.poisson(degree - 1, n)
+    out_degrees[rng.random(n) < dangling] = 0
+    out_degrees[:1] = 0
+    sources = np.repeat(np.arange(n, dtype=INDEX), out_degrees)
+    ends = np.cumsum(out_degrees)
+
+    targets = np.empty(len(sources), dtype=INDEX)
+    for first in range(0, n, ATTACH_BATCH):
+        last = min(first + ATTACH_BATCH, n)
+        start = ends[first - 1] if first else 0
+        stop = ends[last - 1]
+        batch = sources[start:stop]
+        picked = (batch * rng.random(len(batch))).astype(INDEX)
+        if start:
+            copy = rng.random(len(batch)) >= uniform
+            picked[copy] = targets[rng.integers(start, size=copy.sum())]
+        targets[start:stop] = picked
+    return LinkGraph.from_edges(n, sources, targets)
+
+
+# Graph models by name, as chosen on the command line
+MODELS = {"power-law": power_law_graph, "attachment": attachment_graph}
+
+
+def write_html(directory, graph):
+    """
+    Writes a LinkGraph as a corpus of HTML pages in `directory`, one file
+    per page named by its name, linking to the pages it links to.
+    """
+    os.makedirs(directory, exist_ok=True)
+    offsets, targets = graph.out_links()
+    for page, name in enumerate(graph.names):
+        links = targets[offsets[page]:offsets[page + 1]]
+        with open(os.path.join(directory, page_file(name)), "w") as f:
+            f.write(HEADER.format(name=name))
+            for link in links:
+                f.write(LINK.format(
+                    file=page_file(graph.names[link]), name=graph.names[link]
+                ))
+            f.write(FOOTER)
+
+
+def page_file(name):
+    """
+    Returns the file name of a page, adding .html if it has none.
+    """
+    return name if name.endswith(".html") else f"{name}.html"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import numpy as np
+
+# Types of the packed arrays: 32-bit page indices, 64-bit offsets
+INDEX = np.int32
+OFFSET = np.int64
+
+
+def unique(values):
+    """
+    Returns the sorted distinct values of an array, as np.unique does.
+    """
+    values = np.sort(values)
+    first = np.ones(len(values), dtype=bool)
+    first[1:] = values[1:] != values[:-1]
+    return values[first]
+
+
+class LinkGraph():
+    """
+    Links between pages numbered 0 to n - 1, in compressed sparse row
+    form indexed by target: the pages linking to page i are
+    sources[offsets[i]:offsets[i + 1]], sorted. `out_degrees` counts the
+    links from each page, and `names` holds each page's name.
+    """
+
+    def __init__(self, names, offsets, sources, out_degrees):
+        self.names = names
+        self.offsets = offsets
+        self.sources = sources
+        self.out_degrees = out_degrees
+
+        # Pages with at least one link to them, whose sums pull computes
+        self.linked = np.flatnonzero(offsets[1:] > offsets[:-1])
+        self.links = None
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Returns the graph of a corpus as returned by crawl, a dictionary
+        mapping each page to the set of pages it links to, with pages
+        numbered in sorted order.
+        """
+        names = sorted(corpus)
+        index = {name: i for i, name in enumerate(names)}
+        sources = [index[page] for page in names for _ in corpus[page]]
+        targets = [index[link] for page in names for link in corpus[page]]
+        return cls.from_edges(len(names), sources, targets, names)
+
+    @classmethod
+    def from_edges(cls, n, sources, targets, names=None):
+        """
+        Returns the graph of `n` pages with a link from each of `sources`
+        to the matching page of `targets`, dropping duplicate links and
+        links from a page to itself. Pages are named by number if no
+        `names` are given.
+        """
+        sources = np.asarray(sources, dtype=OFFSET)
+        targets = np.asarray(targets, dtype=OFFSET)
+        keep = sources != targets
+        keys = unique(targets[keep] * n + sources[keep])
+        targets, sources = np.divmod(keys, max(n, 1))
+
+        offsets = np.zeros(n + 1, dtype=OFFSET)
+        np.cumsum(np.bincount(targets, minlength=n), out=offsets[1:])
+        out_degrees = np.bincount(sources, minlength=n).astype(OFFSET)
+        if names is None:
+            names = [str(i) for i in range(n)]
+        return cls(names, offsets, sources.astype(INDEX), out_degrees)
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def edges_count(self):
+        return len(self.sources)
+
+    def pull(self, values, pages=None):
+        """
+        Returns, for every page, the sum of `values` over the pages linking
+        to it. `values` has a row per page and may have several columns.
+        If `pages` is an array of page numbers, only their sums are
+        computed and returned, in that order.
+        """
+        if pages is None:
+            result = np.zeros(values.shape, dtype=np.float64)
+            if len(self.linked):
+                result[self.linked] = np.add.reduceat(
+                    values[self.sources], self.offsets[self.linked], axis=0
+                )
+            return result
+
+        # Gather the runs of sources linking to each page
+        starts = self.offsets[pages]
+        counts = self.offsets[pages + 1] - starts
+        ends = np.cumsum(counts)
+        index = np.repeat(starts - ends + counts, counts)
+        index += np.arange(len(index))
+        result = np.zeros((len(pages),) + values.shape[1:], dtype=np.float64)
+        linked = counts > 0
+        if linked.any():
+            result[linked] = np.add.reduceat(
+                values[self.sources[index]], (ends - counts)[linked], axis=0
+            )
+        return result
+
+    def out_links(self):
+        """
+        Returns (offsets, targets) arrays listing the pages each page links
+        to, in compressed sparse row form indexed by source, built once.
+        """
+        if self.links is None:
+            _, targets = self.edges()
+            order = np.argsort(self.sources, kind="stable")
+            offsets = np.zeros(len(self) + 1, dtype=OFFSET)
+            np.cumsum(self.out_degrees, out=offsets[1:])
+            self.links = (offsets, targets[order])
+        return self.links
+
+    def edges(self):
+        """
+        Returns parallel (sources, targets) arrays of every link.
+        """
+        targets = np.repeat(
+            np.arange(len(self), dtype=INDEX), np.diff(self.offsets)
+        )
+        return self.sources, targets
+
+    def teleport(self, seed_sets):
+        """
+        Returns an array of teleport vectors with a column per set of page
+        names in `seed_sets`, spread evenly over the pages of the set.
+        """
+        index = {name: i for i, name in enumerate(self.names)}
+        teleport = np.zeros((len(self), len(seed_sets)))
+        for column, seeds in enumerate(seed_sets):
+            pages = [index[name] for name in seeds]
+            if not pages:
+                raise ValueError("seed sets must not be empty")
+            teleport[pages, column] = 1 / len(pages)
+        return teleport
+
+    def ranks(self, rank):
+        """
+        Returns a dictionary mapping page names to their value in `rank`.
+        """
+        return {name: float(value) for name, value in zip(self.names, rank)}
@@ -0,0 +1,192 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+from crawler import crawl_graph
+from graph import LinkGraph, unique
+from solvers import TOLERANCE, power_iteration
+
+DAMPING = 0.85
+FILENAME = "ranks.npz"
+
+
+def main():
+    compare = len(sys.argv) > 1 and sys.argv[1] == "--compare"
+    args = sys.argv[2:] if compare else sys.argv[1:]
+    if len(args) not in (1, 2):
+        sys.exit("Usage: python incremental.py [--compare] corpus [ranks]")
+    directory = args[0]
+    path = args[1] if len(args) == 2 else os.path.join(directory, FILENAME)
+
+    graph = crawl_graph(directory)
+    saved = load_ranks(path)
+
+    # Solve from scratch only without saved ranks to start from, or to
+    # compare the update with
+    cold = None
+    if saved is None or compare:
+        cold = {}
+        start = time.perf_counter()
+        rank = power_iteration(graph, DAMPING, stats=cold)
+        cold["seconds"] = time.perf_counter() - start
+        print(f"Cold start: {cold['iterations']} iterations "
+              f"in {cold['seconds']:.3f} seconds")
+
+    if saved is not None:
+        stats = {}
+        start = time.perf_counter()
+        rank = update_pagerank(graph, saved, DAMPING, stats=stats)
+        stats["seconds"] = time.perf_counter() - start
+        print_update_stats(stats, graph.edges_count, cold)
+
+    save_ranks(path, graph, rank)
+    print(f"Ranks of {len(graph)} pages saved to {path}.")
+
+
+def save_ranks(path, graph, rank):
+    np.savez(path, names=np.array(graph.names, dtype=str), rank=rank)
+
+
+def load_ranks(path):
+    """
+    Returns a dictionary of the ranks saved at `path` by page name, or
+    None if there are none.
+    """
+    try:
+        with np.load(path) as saved:
+            return dict(zip(saved["names"].tolist(), saved["rank"].tolist()))
+    except FileNotFoundError:
+        return None
+
+
+def apply_changes(graph, added_pages=(), removed_pages=(), added_links=(),
+                  removed_links=()):
+    """
+    Returns a new LinkGraph with pages and (source, target) links, all
+    given by name, added to and removed from `graph`. Removing a page
+    removes its links. Pages keep their order, new pages coming last.
+    Raises ValueError if an added link is not between two pages.
+    """
+    removed_names = set(removed_pages)
+    names = [name for name in graph.names if name not in removed_names]
+    known = set(names)
+    names += [page for page in dict.fromkeys(added_pages) if page not in known]
+    index = {name: i for i, name in enumerate(names)}
+    n = len(names)
+
+    # Renumber the links of pages that remain
+    renumber = np.array(
+        [index.get(name, -1) for name in graph.names], dtype=np.int64
+    )
+    sources, targets = graph.edges()
+    sources, targets = renumber[sources], renumber[targets]
+    keep = (sources >= 0) & (targets >= 0)
+    keys = targets[keep] * n + sources[keep]
+
+    def key(link):
+        source, target = link
+        if source not in index or target not in index:
+            raise ValueError(f"link {source} -> {target} is not between pages")
+        return index[target] * n + index[source]
+
+    if removed_links:
+        removed_keys = [
+            key(link) for link in removed_links
+            if link[0] in index and link[1] in index
+        ]
+        keys = keys[~np.isin(keys, removed_keys)]
+    keys = np.concatenate(
+        [keys, np.array([key(link) for link in added_links], dtype=np.int64)]
+    )
+    targets, sources = np.divmod(keys, max(n, 1))
+    return LinkGraph.from_edges(n, sources, targets, names)
+
+
+def update_pagerank(graph, saved, damping, tolerance=TOLERANCE, stats=None):
+    """
+    Returns the PageRank vector of a LinkGraph starting from `saved`, a
+    dictionary of ranks by page name from before the graph changed.
+    New pages start at 1 / n, and the start is scaled to sum to 1.
+    """
+    new = 1 / len(graph)
+    rank = np.array([saved.get(name, new) for name in graph.names])
+    return propagate(graph, rank / rank.sum(), damping, tolerance, stats)
+
+
+def propagate(graph, rank, damping, tolerance=TOLERANCE, stats=None):
+    """
+    Returns the PageRank vector of a LinkGraph from an estimate `rank`
+    close to it, by pushing the error only from pages where it is large.
+
+    Each page holds a residual, the amount by which one more iteration
+    would change it. Pushing a page adds its residual to its rank and
+    passes `damping` of it on, shared among the pages it links to. Where
+    the graph did not change, the residual of the old ranks is the same
+    for every page. So is the jump to a random page, and the rank spread
+    by pages without links. A residual equal on every page only scales
+    the result, which is normalized at the end, so these parts are left
+    out. Only pages near a change then have residuals to push, and the
+    push stops once every residual is below a threshold that bounds the
+    L1 error by `tolerance`.
+
+    If `stats` is a dictionary, "rounds" of pushes, "pushes" of a page
+    and "edges" followed are stored in it.
+    """
+    n = len(graph)
+    offsets, targets = graph.out_links()
+    degrees = graph.out_degrees
+    rank = rank.copy()
+    residual = damping * graph.pull(rank / np.maximum(degrees, 1)) - rank
+    residual -= np.median(residual)
+    threshold = tolerance * (1 - damping) / n
+
+    rounds = pushes = edges = 0
+    active = np.flatnonzero(np.abs(residual) > threshold)
+    while len(active):
+        pushed = residual[active]
+        rank[active] += pushed
+        residual[active] = 0
+
+        # Share each pushed residual among the page's links
+        linked = degrees[active] > 0
+        counts = degrees[active[linked]]
+        starts = offsets[active[linked]]
+        index = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        reached = targets[index + np.arange(len(index))]
+        shares = damping * pushed[linked] / counts
+        np.add.at(residual, reached, np.repeat(shares, counts))
+
+        rounds += 1
+        pushes += len(active)
+        edges += len(reached)
+        reached = unique(reached)
+        active = reached[np.abs(residual[reached]) > threshold]
+
+    if stats is not None:
+        stats["rounds"] = rounds
+        stats["pushes"] = pushes
+        stats["edges"] = edges
+    return rank / rank.sum()
+
+
+def print_update_stats(stats, edges_count, cold=None):
+    """
+    Prints the work of an incremental update as rounds of pushes and as
+    the equivalent number of full iterations, against the stats of a
+    cold start if given.
+    """
+    equivalent = stats["edges"] / max(edges_count, 1)
+    print(f"Warm start: {stats['rounds']} rounds pushing "
+          f"{stats['pushes']} pages along {stats['edges']} links "
+          f"in {stats['seconds']:.3f} seconds")
+    if cold is None:
+        print(f"  Work of {equivalent:.2f} full iterations")
+    else:
+        print(f"  Work of {equivalent:.2f} full iterations, "
+              f"{cold['iterations'] - equivalent:.2f} saved")
+
+
+if __name__ == "__main__":
+    main()
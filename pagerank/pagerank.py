@@ -3,14 +3,45 @@ import random
 import re
 import sys
 
+import numpy as np
+
+from edgefile import EdgeFile, stream_pagerank
+from graph import LinkGraph
+from sampling import print_progress, sample_batches, sample_parallel
+from solvers import SOLVERS, personalized_iteration
+
 DAMPING = 0.85
 SAMPLES = 100000
-rank = -1
-pagerank = {}
+TOP = 10
+
+# Most samples drawn by parallel sampling, which stops early once the
+# widest 95% confidence interval of a page's rank is within HALF_WIDTH
+PARALLEL_SAMPLES = 10 ** 8
+HALF_WIDTH = 5e-4
 
 def main():
+    if len(sys.argv) == 3 and sys.argv[1] == "--edges":
+        edges = EdgeFile(sys.argv[2])
+        rank = stream_pagerank(edges, DAMPING)
+        top = np.argsort(-rank, kind="stable")[:TOP]
+        print(f"PageRank Results from Streaming {sys.argv[2]} "
+              f"(top {len(top)} of {len(edges)} pages)")
+        for page, name in zip(top, edges.names(top)):
+            print(f"  {name}: {rank[page]:.4f}")
+        return
+    if len(sys.argv) == 3 and sys.argv[1] == "--parallel":
+        corpus = crawl(sys.argv[2])
+        ranks = sample_pagerank(
+            corpus, DAMPING, PARALLEL_SAMPLES, method="parallel"
+        )
+        print(f"PageRank Results from Parallel Sampling "
+              f"(within ±{HALF_WIDTH})")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f}")
+        return
     if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
+        sys.exit("Usage: python pagerank.py [--parallel] corpus "
+                 "| --edges file")
     corpus = crawl(sys.argv[1])
     ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
@@ -76,7 +107,8 @@ def transition_model(corpus, page, damping_factor):
         
     return probabilities
 
-def sample_pagerank(corpus, damping_factor, n):
+def sample_pagerank(corpus, damping_factor, n, method="walk",
+                    tolerance=HALF_WIDTH):
     """
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
@@ -84,54 +116,47 @@ def sample_pagerank(corpus, damping_factor, n):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    `method` is "walk" for a single surfer drawing each step in constant
+    time, "batch" for many surfers walking together in NumPy arrays, or
+    "parallel" for independent batches of surfers on a process pool,
+    which stops before `n` samples once the widest 95% confidence
+    interval of a rank is within `tolerance` of it.
     """
+    if method == "batch":
+        graph = LinkGraph.from_corpus(corpus)
+        return graph.ranks(sample_batches(graph, damping_factor, n))
+    elif method == "parallel":
+        graph = LinkGraph.from_corpus(corpus)
+        return graph.ranks(sample_parallel(
+            graph, damping_factor, n, tolerance, progress=print_progress
+        ))
+    elif method != "walk":
+        raise ValueError(f"unknown sampling method {method}")
+
     pagerank = {}
     for key in corpus:
         pagerank[key] = 0
-    
-    page = random.choice(list(corpus))
+
+    # Following a link with probability damping_factor, and otherwise
+    # jumping to any page, draws from transition_model in constant time
+    pages = list(corpus)
+    links = {page: list(corpus[page]) for page in corpus}
+    page = random.choice(pages)
     
     for _ in range(n):
         pagerank[page] += 1
-        probabilities = transition_model(corpus, page, damping_factor)
-        page = random.choices(list(probabilities.keys()), weights=probabilities.values(), k=1)[0]
+        if links[page] and random.random() < damping_factor:
+            page = random.choice(links[page])
+        else:
+            page = random.choice(pages)
 
     for key in pagerank:
         pagerank[key] = pagerank[key] / n
         
     return pagerank
     
-def calculate_pr(corpus, p, damping_factor):
-    global pagerank
-    #Maps every link to current page to their count of total links
-    links = {}
-    check = False
-    for key in corpus:
-        counter = 0
-        for value in corpus[key]:
-            counter += 1
-            if value == p:
-                check = True
-        if check:
-            links[key] = counter
-            check = False
-            
-    corpus_length = len(corpus)
-    
-    pr = (1 - damping_factor) / corpus_length
-    sigma = 0
-    
-    for link in links:
-        sigma += pagerank[link] / links[link]      
-    pr += damping_factor * sigma
-    
-    if (max(pr, pagerank[p]) - min(pr, pagerank[p])) < 0.00001:
-        return True
-    
-    pagerank[p] = pr 
-    return False
-    
-def iterate_pagerank(corpus, damping_factor):
+def iterate_pagerank(corpus, damping_factor, method="power"):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
@@ -139,22 +164,33 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    `method` names the solver: "power" for power iteration,
+    "gauss-seidel" for Gauss-Seidel sweeps, "aitken" or "quadratic" for
+    power iteration with extrapolation, or "adaptive" for power
+    iteration that stops updating pages once they converge.
     """
-    length = len(corpus)
-    for page in corpus:
-        pagerank[page] = 1 / length
-    
-    flag = True
-    while flag:  
-        if not flag:
-            break
-        
-        for page in pagerank:
-            if calculate_pr(corpus, page, damping_factor):
-                flag = False
-                
-    return pagerank
-     
+    if method not in SOLVERS:
+        raise ValueError(f"unknown solver {method}")
+    graph = LinkGraph.from_corpus(corpus)
+    return graph.ranks(SOLVERS[method](graph, damping_factor))
+
+
+def personalized_pagerank(corpus, damping_factor, seed_sets):
+    """
+    Return PageRank values personalized to each of `seed_sets`, sets of
+    pages that a random jump lands on instead of any page in the corpus,
+    computed together.
+
+    Return a list with a dictionary for each seed set, where keys are
+    page names, and values are their PageRank value for that set.
+    """
+    graph = LinkGraph.from_corpus(corpus)
+    rank = personalized_iteration(
+        graph, damping_factor, graph.teleport(seed_sets)
+    )
+    return [graph.ranks(column) for column in rank.T]
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,190 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Most random surfers advanced together by one NumPy step, and the fewest
+# steps each takes, as the first pages of a walk are biased towards its
+# uniformly random start
+SURFERS = 4096
+MIN_STEPS = 1000
+
+# Pages visited between updates of the visit counts
+BLOCK = 2 ** 20
+
+# Independent walkers of sample_parallel, the samples each draws per
+# round between checks of the estimate, and the z-score of the
+# confidence interval checked
+STREAMS = 16
+ROUND = 2 ** 18
+Z = 1.96
+
+# State of a sample_parallel worker process, set by init_worker
+worker = {}
+
+
+def sample_batches(graph, damping, n, rng=None):
+    """
+    Returns PageRank estimated from `n` pages visited by random surfers
+    on a LinkGraph, as the fraction of visits to each page.
+
+    Surfers walk in a batch, each NumPy step moving all of them at once.
+    A surfer follows a random link from its page with probability
+    `damping`, and otherwise, or if the page has no links, jumps to a
+    random page. `rng` is a NumPy Generator, seeded from the OS by default.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    pages = rng.integers(len(graph), size=surfers_for(n))
+    counts, _ = walk(graph, damping, pages, n, rng)
+    return counts / n
+
+
+def surfers_for(n):
+    """
+    Returns how many surfers should share `n` samples.
+    """
+    return max(1, min(SURFERS, n // MIN_STEPS))
+
+
+def walk(graph, damping, pages, n, rng):
+    """
+    Moves surfers starting from `pages` until they have visited `n` pages
+    in all, counting the start. Returns the visit counts of each page and
+    the pages the surfers move on to next.
+    """
+    size = len(graph)
+    offsets, targets = graph.out_links()
+    degrees = graph.out_degrees
+
+    counts = np.zeros(size, dtype=np.int64)
+    visited = []
+    remaining = n
+    while remaining > 0:
+        visited.append(pages[:remaining])
+        remaining -= len(visited[-1])
+        if len(visited) * len(pages) >= BLOCK or remaining <= 0:
+            counts += np.bincount(np.concatenate(visited), minlength=size)
+            visited = []
+
+        # Follow a link where one is taken, otherwise jump anywhere
+        degree = degrees[pages]
+        follow = (rng.random(len(pages)) < damping) & (degree > 0)
+        link = offsets[pages[follow]] + (
+            rng.random(np.count_nonzero(follow)) * degree[follow]
+        ).astype(np.int64)
+        pages = rng.integers(size, size=len(pages))
+        pages[follow] = targets[link]
+    return counts, pages
+
+
+def sample_parallel(graph, damping, n, tolerance=None, workers=None,
+                    seed=None, progress=None, stats=None):
+    """
+    Returns PageRank estimated from up to `n` samples drawn by STREAMS
+    independent walkers, each a batch of surfers as in sample_batches,
+    run in rounds on a pool of `workers` processes (one per CPU by default).
+
+    Walker i draws round r from its own random stream, spawned from
+    `seed` for (i, r), so the estimate depends on the seed alone and not
+    on how many workers there are. Each walker's surfers carry on from
+    where they stopped in the previous round.
+
+    After each round the walkers' separate estimates give a confidence
+    interval for every page, and sampling stops early once the widest
+    is within `tolerance` of the estimate. `progress`, if given, is
+    called after each round with the samples drawn and that width.
+    If `stats` is a dictionary, "samples", "rounds" and "half_width"
+    are stored in it.
+    """
+    workers = workers or os.cpu_count() or 1
+    streams = [
+        np.random.SeedSequence(seed, spawn_key=(i,)) for i in range(STREAMS)
+    ]
+    quotas = [
+        n // STREAMS + (i < n % STREAMS) for i in range(STREAMS)
+    ]
+    pages = [None] * STREAMS
+    counts = np.zeros((STREAMS, len(graph)), dtype=np.int64)
+
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(
+            workers, initializer=init_worker, initargs=(graph, damping)
+        )
+    else:
+        init_worker(graph, damping)
+    try:
+        rounds = 0
+        half_width = float("inf")
+        while sum(quotas) and not (tolerance and half_width <= tolerance):
+            walkers = [i for i in range(STREAMS) if quotas[i]]
+            tasks = [
+                (pages[i], min(ROUND, quotas[i]), streams[i].spawn(1)[0])
+                for i in walkers
+            ]
+            if executor is None:
+                results = map(walk_round, tasks)
+            else:
+                results = executor.map(walk_round, tasks)
+            for i, (_, samples, _), (walker_counts, walker_pages) in zip(
+                walkers, tasks, results
+            ):
+                counts[i] += walker_counts
+                pages[i] = walker_pages
+                quotas[i] -= samples
+
+            rounds += 1
+            half_width = confidence(counts)
+            if progress is not None:
+                progress(int(counts.sum()), half_width)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if stats is not None:
+        stats["samples"] = int(counts.sum())
+        stats["rounds"] = rounds
+        stats["half_width"] = half_width
+    total = counts.sum(axis=0)
+    return total / total.sum()
+
+
+def print_progress(samples, half_width):
+    print(f"  {samples} samples, widest 95% interval ±{half_width:.5f}")
+
+
+def init_worker(graph, damping):
+    graph.out_links()
+    worker["graph"] = graph
+    worker["damping"] = damping
+
+
+def walk_round(task):
+    """
+    Draws one round of samples for a walker, from a (pages, samples,
+    seed) task, starting its surfers if `pages` is None. There are few
+    enough surfers for each to take MIN_STEPS steps in a round. Returns
+    the visit counts and the surfers' next pages.
+    """
+    pages, samples, seed = task
+    graph = worker["graph"]
+    rng = np.random.default_rng(seed)
+    if pages is None:
+        pages = rng.integers(len(graph), size=surfers_for(samples))
+    return walk(graph, worker["damping"], pages, samples, rng)
+
+
+def confidence(counts):
+    """
+    Returns the widest confidence interval half-width over all pages for
+    the mean of the walkers' estimates, given a row of visit counts per
+    walker. Walkers are independent, unlike the samples of one walker,
+    so the spread of their estimates measures the error honestly.
+    """
+    samples = counts.sum(axis=1)
+    if len(samples) < 2 or not samples.all():
+        return float("inf")
+    estimates = counts / samples[:, None]
+    spread = estimates.std(axis=0, ddof=1).max()
+    return float(Z * spread / np.sqrt(len(samples)))
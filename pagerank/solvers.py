@@ -0,0 +1,328 @@
+from functools import partial
+
+import numpy as np
+
+# Iteration stops once the ranks of all pages together change by less
+# than TOLERANCE (in L1 norm), or after MAX_ITERATIONS
+TOLERANCE = 1e-8
+MAX_ITERATIONS = 1000
+
+# Power iterations between extrapolations
+EXTRAPOLATE = 10
+
+# Iterations of adaptive_iteration between full iterations, and the
+# share of pages still active, as a fraction 1 / ADAPTIVE_FULL, above
+# which summing over every page beats gathering the active ones
+REFRESH = 10
+ADAPTIVE_FULL = 3
+
+
+def power_iteration(graph, damping, tolerance=TOLERANCE, stats=None):
+    """
+    Returns the PageRank vector of a LinkGraph by power iteration, one
+    sparse multiply per iteration. A page without links is treated as
+    linking to every page, itself included, so its rank is spread evenly.
+
+    If `stats` is a dictionary, the number of iterations and the final
+    L1 change are stored in stats["iterations"] and stats["residual"].
+    """
+    n = len(graph)
+    rank = np.full(n, 1 / n)
+    dangling = graph.out_degrees == 0
+    inverse = 1 / np.maximum(graph.out_degrees, 1)
+
+    residual = float("inf")
+    iterations = 0
+    while residual >= tolerance and iterations < MAX_ITERATIONS:
+        new_rank = step(graph, rank, damping, dangling, inverse)
+        residual = np.abs(new_rank - rank).sum()
+        rank = new_rank
+        iterations += 1
+
+    if stats is not None:
+        stats["iterations"] = iterations
+        stats["residual"] = float(residual)
+    return rank
+
+
+def step(graph, rank, damping, dangling, inverse):
+    """
+    Returns the ranks after one power iteration from `rank`.
+    """
+    spread = (1 - damping + damping * rank[dangling].sum()) / len(graph)
+    return damping * graph.pull(rank * inverse) + spread
+
+
+def gauss_seidel(graph, damping, tolerance=TOLERANCE, stats=None):
+    """
+    Returns the PageRank vector of a LinkGraph by Gauss-Seidel sweeps,
+    which update pages in order, each from the ranks already updated
+    earlier in the sweep, so that a change can travel several links in
+    one sweep. A sweep is a sparse triangular solve, run by SciPy as
+    updating one page at a time is slow in Python. The rank spread by
+    random jumps and by pages without links is that of the last sweep.
+
+    If `stats` is a dictionary, the number of sweeps and the final L1
+    change are stored in stats["iterations"] and stats["residual"].
+    """
+    from scipy.sparse import csr_matrix, identity, tril, triu
+    from scipy.sparse.linalg import spsolve_triangular
+
+    n = len(graph)
+    rank = np.full(n, 1 / n)
+    dangling = graph.out_degrees == 0
+    inverse = 1 / np.maximum(graph.out_degrees, 1)
+
+    # Split the links into those from pages earlier in the sweep and later
+    sources, targets = graph.edges()
+    links = csr_matrix(
+        (damping * inverse[sources], (targets, sources)), shape=(n, n)
+    )
+    earlier = (identity(n, format="csr") - tril(links, -1)).tocsr()
+    later = triu(links, 1).tocsr()
+
+    residual = float("inf")
+    iterations = 0
+    while residual >= tolerance and iterations < MAX_ITERATIONS:
+        previous = rank / rank.sum()
+        spread = (
+            (1 - damping) * rank.sum() + damping * rank[dangling].sum()
+        ) / n
+        rank = spsolve_triangular(earlier, later @ rank + spread, lower=True)
+
+        # The total rank drifts, and is normalized away, so only the
+        # change in its distribution counts
+        residual = np.abs(rank / rank.sum() - previous).sum()
+        iterations += 1
+
+    if stats is not None:
+        stats["iterations"] = iterations
+        stats["residual"] = float(residual)
+    return rank / rank.sum()
+
+
+def extrapolated_iteration(graph, damping, tolerance=TOLERANCE,
+                           extrapolate=None, stats=None):
+    """
+    Returns the PageRank vector of a LinkGraph by power iteration, with
+    the ranks replaced every EXTRAPOLATE iterations by `extrapolate`
+    (quadratic by default, or aitken) of the latest iterates, which
+    estimates the limit they are converging to.
+
+    If `stats` is a dictionary, the number of iterations, the final L1
+    change and the number of extrapolations are stored in
+    stats["iterations"], stats["residual"] and stats["extrapolations"].
+    """
+    extrapolate = extrapolate or quadratic
+    n = len(graph)
+    rank = np.full(n, 1 / n)
+    dangling = graph.out_degrees == 0
+    inverse = 1 / np.maximum(graph.out_degrees, 1)
+
+    history = [rank]
+    residual = float("inf")
+    iterations = extrapolations = 0
+    while residual >= tolerance and iterations < MAX_ITERATIONS:
+        new_rank = step(graph, rank, damping, dangling, inverse)
+        residual = np.abs(new_rank - rank).sum()
+        rank = new_rank
+        history = history[-3:] + [rank]
+        iterations += 1
+        if iterations % EXTRAPOLATE or residual < tolerance:
+            continue
+
+        # Keep the extrapolation only if the iteration after it changes
+        # the ranks less than the last one did
+        estimate = extrapolate(history)
+        new_rank = step(graph, estimate, damping, dangling, inverse)
+        change = np.abs(new_rank - estimate).sum()
+        iterations += 1
+        if change < residual:
+            residual = change
+            rank = new_rank
+            history = [estimate, rank]
+            extrapolations += 1
+
+    if stats is not None:
+        stats["iterations"] = iterations
+        stats["residual"] = float(residual)
+        stats["extrapolations"] = extrapolations
+    return rank
+
+
+def aitken(history):
+    """
+    Returns Aitken's delta-squared extrapolation of the last three ranks
+    in `history`, page by page. Each page's last two changes give the
+    ratio by which its changes shrink, and it moves on by the rest of
+    that geometric series, if the ratio is below 1.
+    """
+    before, last, rank = history[-3:]
+    change = rank - last
+    ratio = np.divide(
+        change, last - before, out=np.zeros_like(rank),
+        where=last != before
+    )
+    ratio[np.abs(ratio) >= 1] = 0
+    return normalize(rank + change * ratio / (1 - ratio))
+
+
+def quadratic(history):
+    """
+    Returns the quadratic extrapolation of the last four ranks in
+    `history`, which assumes the error lies in the space of the second
+    and third eigenvectors and fits their eigenvalues by least squares.
+    """
+    first, second, third, rank = history[-4:]
+    differences = np.column_stack([second - first, third - first])
+    gamma, *_ = np.linalg.lstsq(differences, first - rank, rcond=None)
+    beta = (gamma[0] + gamma[1] + 1, gamma[1] + 1, 1)
+    return normalize(beta[0] * second + beta[1] * third + beta[2] * rank)
+
+
+def normalize(rank):
+    """
+    Returns `rank` made non-negative and scaled to sum to 1.
+    """
+    rank = np.abs(rank)
+    return rank / rank.sum()
+
+
+def adaptive_iteration(graph, damping, tolerance=TOLERANCE, stats=None):
+    """
+    Returns the PageRank vector of a LinkGraph by power iteration that
+    stops recomputing a page once its rank changes by less than
+    tolerance / n in an iteration, as most pages converge long before
+    the slowest. Every REFRESH iterations, or once every page is frozen,
+    a full iteration recomputes them all, freezing anew only those that
+    still change little, and only a full iteration can end the iteration.
+
+    If `stats` is a dictionary, the number of iterations, the final L1
+    change and the number of page updates are stored in
+    stats["iterations"], stats["residual"] and stats["updates"].
+    """
+    n = len(graph)
+    rank = np.full(n, 1 / n)
+    dangling = graph.out_degrees == 0
+    inverse = 1 / np.maximum(graph.out_degrees, 1)
+
+    active = np.arange(n)
+    since_full = REFRESH
+    residual = float("inf")
+    iterations = updates = 0
+    while residual >= tolerance and iterations < MAX_ITERATIONS:
+        spread = (1 - damping + damping * rank[dangling].sum()) / n
+        if since_full >= REFRESH or not len(active):
+            new_rank = damping * graph.pull(rank * inverse) + spread
+            change = np.abs(new_rank - rank)
+            residual = change.sum()
+            rank = new_rank
+            active = np.flatnonzero(change >= tolerance / n)
+            since_full = 0
+            updates += n
+        else:
+            if len(active) * ADAPTIVE_FULL > n:
+                pulled = graph.pull(rank * inverse)[active]
+            else:
+                pulled = graph.pull(rank * inverse, active)
+            new_rank = damping * pulled + spread
+            change = np.abs(new_rank - rank[active])
+            rank[active] = new_rank
+            updates += len(active)
+            active = active[change >= tolerance / n]
+        since_full += 1
+        iterations += 1
+
+    if stats is not None:
+        stats["iterations"] = iterations
+        stats["residual"] = float(residual)
+        stats["updates"] = updates
+    return rank / rank.sum()
+
+
+def personalized_iteration(graph, damping, teleport, tolerance=TOLERANCE,
+                           stats=None):
+    """
+    Returns PageRank vectors of a LinkGraph personalized by `teleport`,
+    an array with a row per page and a column per vector: a random jump
+    lands on each page in proportion to its entry in the column. Pages
+    without links jump the same way. Every column is solved at once by
+    power iteration, one sparse multiply of all the columns still
+    changing by at least `tolerance` per iteration, run by SciPy as
+    summing many columns at once is slow in NumPy. Returns an array of
+    the same shape.
+
+    If `stats` is a dictionary, the number of iterations and the largest
+    final L1 change are stored in stats["iterations"] and
+    stats["residual"].
+    """
+    from scipy.sparse import csr_matrix
+
+    teleport = np.asarray(teleport, dtype=np.float64)
+    totals = teleport.sum(axis=0)
+    if (teleport < 0).any() or not (totals > 0).all():
+        raise ValueError("teleport vectors must be non-negative and not zero")
+    teleport = teleport / totals
+    n = len(graph)
+    inverse = 1 / np.maximum(graph.out_degrees, 1)
+    dangling = (graph.out_degrees == 0).astype(np.float64)
+    ones = np.ones(n)
+
+    # The rows of the graph's arrays already form a matrix by target
+    links = csr_matrix(
+        (damping * inverse[graph.sources], graph.sources, graph.offsets),
+        shape=(n, n)
+    )
+
+    # Columns still changing are kept together in `current`, and moved to
+    # `rank` once converged. Random jumps land only where a teleport
+    # vector is not zero, usually on few pages, so only those entries are
+    # added to. Sums over pages are products with a vector, much faster
+    # than summing the columns of an array.
+    rank = teleport.copy()
+    columns = np.arange(teleport.shape[1])
+    current = teleport.copy()
+    pages, jumps = np.nonzero(teleport)
+    weights = teleport[pages, jumps]
+    residual = 0.0
+    iterations = 0
+    while len(columns) and iterations < MAX_ITERATIONS:
+        spread = 1 - damping + damping * (dangling @ current)
+        new_rank = links @ current
+        new_rank[pages, jumps] += weights * spread[jumps]
+        current -= new_rank
+        changes = ones @ np.abs(current, out=current)
+        current = new_rank
+        iterations += 1
+
+        converged = changes < tolerance
+        if converged.any():
+            rank[:, columns[converged]] = current[:, converged]
+            residual = max(residual, changes[converged].max())
+            columns = columns[~converged]
+            current = current[:, ~converged]
+
+            # Renumber the teleport entries of the columns left
+            left = ~converged[jumps]
+            renumber = np.cumsum(~converged) - 1
+            pages, jumps = pages[left], renumber[jumps[left]]
+            weights = weights[left]
+
+    if len(columns):
+        rank[:, columns] = current
+        residual = max(residual, changes.max())
+
+    if stats is not None:
+        stats["iterations"] = iterations
+        stats["residual"] = float(residual)
+    return rank
+
+
+# Solvers by name, as chosen by iterate_pagerank
+SOLVERS = {
+    "power": power_iteration,
+    "gauss-seidel": gauss_seidel,
+    "aitken": partial(extrapolated_iteration, extrapolate=aitken),
+    "quadratic": partial(extrapolated_iteration, extrapolate=quadratic),
+    "adaptive": adaptive_iteration,
+}
@@ -0,0 +1,430 @@
+import os
+import random
+import re
+
+import numpy as np
+import pytest
+
+import benchmark
+import crawler
+from edgefile import EdgeFile, stream_pagerank, write_edge_file
+from generate import MODELS, power_law_graph, write_html
+from graph import LinkGraph
+from incremental import apply_changes, load_ranks, save_ranks, update_pagerank
+from pagerank import (
+    crawl, iterate_pagerank, personalized_pagerank, sample_pagerank,
+    transition_model
+)
+from sampling import sample_batches, sample_parallel
+from solvers import SOLVERS, personalized_iteration, power_iteration
+
+DAMPING = 0.85
+SEED = 0
+
+# Samples drawn by the sampling tests, whose L1 error is expected to be
+# within SAMPLING_ERROR times the square root of pages per 100
+SAMPLES = 200000
+SAMPLING_ERROR = 0.05
+
+# Example corpora shipped with the project
+CORPORA = [
+    os.path.join(os.path.dirname(__file__), f"corpus{i}") for i in range(3)
+]
+
+
+def random_corpus(pages, seed=SEED):
+    """
+    Returns a corpus dictionary of a random power-law graph, with pages
+    without links.
+    """
+    graph = power_law_graph(np.random.default_rng(seed), pages, site=10)
+    offsets, targets = graph.out_links()
+    return {
+        f"{page}.html": {
+            f"{link}.html" for link in targets[offsets[page]:offsets[page + 1]]
+        }
+        for page in range(len(graph))
+    }
+
+
+def reference_ranks(corpus, damping=DAMPING):
+    """
+    Returns PageRank by page name, solved exactly from the Markov chain of
+    transition_model.
+    """
+    names = sorted(corpus)
+    n = len(names)
+    index = {name: i for i, name in enumerate(names)}
+    chain = np.zeros((n, n))
+    for page in names:
+        model = transition_model(corpus, page, damping)
+        for target, probability in model.items():
+            chain[index[target], index[page]] = probability
+    rank = np.linalg.solve(
+        np.eye(n) - chain + np.ones((n, n)) / n, np.ones(n) / n
+    )
+    return dict(zip(names, rank))
+
+
+def distance(ranks, reference):
+    """
+    Returns the L1 distance between two dictionaries of ranks.
+    """
+    return sum(abs(ranks[page] - reference[page]) for page in reference)
+
+
+@pytest.fixture(params=CORPORA + [300])
+def corpus(request):
+    if isinstance(request.param, int):
+        return random_corpus(request.param)
+    return crawl(request.param)
+
+
+def test_link_graph_matches_corpus(corpus):
+    graph = LinkGraph.from_corpus(corpus)
+    offsets, targets = graph.out_links()
+    assert graph.names == sorted(corpus)
+    assert graph.edges_count == sum(len(links) for links in corpus.values())
+    for page, name in enumerate(graph.names):
+        links = {graph.names[link]
+                 for link in targets[offsets[page]:offsets[page + 1]]}
+        assert links == corpus[name]
+        assert graph.out_degrees[page] == len(corpus[name])
+        linking = graph.sources[graph.offsets[page]:graph.offsets[page + 1]]
+        assert {graph.names[source] for source in linking} == {
+            other for other in corpus if name in corpus[other]
+        }
+
+
+def test_iterate_matches_reference(corpus):
+    ranks = iterate_pagerank(corpus, DAMPING)
+    assert sum(ranks.values()) == pytest.approx(1)
+    assert distance(ranks, reference_ranks(corpus)) < 1e-7
+
+
+def sampling_error(corpus):
+    return SAMPLING_ERROR * np.sqrt(len(corpus) / 100)
+
+
+def test_sampling_matches_reference(corpus):
+    reference = reference_ranks(corpus)
+    random.seed(SEED)
+    ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
+    assert sorted(ranks) == sorted(corpus)
+    assert sum(ranks.values()) == pytest.approx(1)
+    assert distance(ranks, reference) < sampling_error(corpus)
+
+    graph = LinkGraph.from_corpus(corpus)
+    rng = np.random.default_rng(SEED)
+    ranks = graph.ranks(sample_batches(graph, DAMPING, SAMPLES, rng))
+    assert sum(ranks.values()) == pytest.approx(1)
+    assert distance(ranks, reference) < sampling_error(corpus)
+
+
+def test_parallel_sampling_is_reproducible_and_stops_early():
+    corpus = random_corpus(300)
+    graph = LinkGraph.from_corpus(corpus)
+    reference = reference_ranks(corpus)
+    rank = sample_parallel(graph, DAMPING, SAMPLES, workers=1, seed=SEED)
+    assert np.array_equal(
+        rank, sample_parallel(graph, DAMPING, SAMPLES, workers=2, seed=SEED)
+    )
+    assert distance(graph.ranks(rank), reference) < sampling_error(corpus)
+
+    stats = {}
+    rank = sample_parallel(
+        graph, DAMPING, 10 ** 9, tolerance=1e-3, seed=SEED, stats=stats
+    )
+    assert stats["samples"] < 10 ** 9
+    assert stats["half_width"] <= 1e-3
+    assert distance(graph.ranks(rank), reference) < sampling_error(corpus)
+
+
+def write_corpus(directory, pages=60, seed=SEED):
+    """
+    Writes a random corpus of HTML pages to `directory`, with links to
+    pages outside it, links to the page itself, repeated links, other
+    attributes before href, and a file that is not a page.
+    """
+    rng = random.Random(seed)
+    names = [f"page{i}.html" for i in range(pages)]
+    for name in names:
+        links = rng.sample(names, rng.randrange(6)) + ["missing.html"]
+        links += [name] + links[:2]
+        with open(os.path.join(directory, name), "w") as f:
+            f.write(f"<html><body><h1>{name}</h1>\n")
+            for link in links:
+                attributes = rng.choice(("", 'class="x" ', 'id="a" lang="b" '))
+                f.write(f'<p>{name}</p>'
+                        f'<a {attributes}href="{link}">link</a>\n')
+            f.write("</body></html>\n")
+    with open(os.path.join(directory, "notes.txt"), "w") as f:
+        f.write('<a href="page0.html">page0</a>')
+
+
+@pytest.mark.parametrize("pool, read_size", [
+    ("process", None), ("thread", None), ("thread", 7),
+])
+def test_crawl_graph_matches_crawl(tmp_path, monkeypatch, pool, read_size):
+    # Tiny reads cut tags across the blocks a file is read in
+    if read_size is not None:
+        monkeypatch.setattr(crawler, "READ_SIZE", read_size)
+    write_corpus(tmp_path)
+    stats = {}
+    graph = crawler.crawl_graph(tmp_path, workers=2, pool=pool, stats=stats)
+    corpus = crawl(tmp_path)
+    assert graph.names == sorted(corpus)
+    offsets, targets = graph.out_links()
+    for page, name in enumerate(graph.names):
+        assert {
+            graph.names[link]
+            for link in targets[offsets[page]:offsets[page + 1]]
+        } == corpus[name]
+    assert stats["files"] == len(corpus)
+    assert stats["links"] == graph.edges_count
+
+
+def test_extract_links_across_blocks(tmp_path, monkeypatch):
+    # Links with a "<" or ">" in a value, and fragments of tags, moved
+    # across every offset around the end of the first block
+    tags = (
+        '<a title="x<y" href="first.html">', '<a\nhref="second.html">',
+        '<a href="x>y.html">', '<a title="<a" href="third.html">',
+        '<b>', '<a>', '< a href="no.html">', '<a id="a>" href="no.html">',
+    )
+    contents = "".join(tags) * 2
+    size = 64
+    monkeypatch.setattr(crawler, "READ_SIZE", size)
+    path = tmp_path / "page.html"
+    for padding in range(size - len(contents), size + 1):
+        text = "." * max(padding, 0) + contents[max(-padding, 0):]
+        path.write_text(text)
+        expected = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", text)
+        assert [
+            link.decode() for link in crawler.extract_links(path)
+        ] == expected
+
+
+def random_changes(rng, corpus, count):
+    """
+    Returns a copy of `corpus` with `count` random pages and links each
+    added and removed, and the changes as apply_changes takes them.
+    """
+    corpus = {page: set(links) for page, links in corpus.items()}
+    removed_pages = rng.sample(sorted(corpus), count)
+    for page in removed_pages:
+        del corpus[page]
+    for links in corpus.values():
+        links.difference_update(removed_pages)
+    added_pages = [f"new{i}.html" for i in range(count)]
+    for page in added_pages:
+        corpus[page] = set()
+
+    pages = sorted(corpus)
+    linked = [(page, link) for page in pages for link in sorted(corpus[page])]
+    removed_links = rng.sample(linked, min(count, len(linked)))
+    for page, link in removed_links:
+        corpus[page].discard(link)
+    added_links = []
+    while len(added_links) < count:
+        page, link = rng.sample(pages, 2)
+        if link not in corpus[page]:
+            corpus[page].add(link)
+            added_links.append((page, link))
+
+    # Links to and from removed pages are ignored
+    removed_links.append((removed_pages[0], pages[0]))
+    changes = {
+        "added_pages": added_pages, "removed_pages": removed_pages,
+        "added_links": added_links, "removed_links": removed_links,
+    }
+    return corpus, changes
+
+
+def test_incremental_update_matches_reference(tmp_path):
+    rng = random.Random(SEED)
+    corpus = random_corpus(300)
+    graph = LinkGraph.from_corpus(corpus)
+    path = os.path.join(tmp_path, "ranks.npz")
+    save_ranks(path, graph, power_iteration(graph, DAMPING, tolerance=1e-12))
+    assert load_ranks(os.path.join(tmp_path, "none.npz")) is None
+
+    for count in (1, 5, 20):
+        changed, changes = random_changes(rng, corpus, count)
+        updated = apply_changes(graph, **changes)
+        assert sorted(updated.names) == sorted(changed)
+        assert updated.edges_count == sum(map(len, changed.values()))
+
+        stats = {}
+        rank = update_pagerank(updated, load_ranks(path), DAMPING, stats=stats)
+        assert sum(rank) == pytest.approx(1)
+        assert distance(updated.ranks(rank), reference_ranks(changed)) < 1e-7
+        assert stats["edges"] < 20 * updated.edges_count
+
+    with pytest.raises(ValueError):
+        apply_changes(graph, added_links=[("0.html", "missing.html")])
+
+
+@pytest.mark.parametrize("chunk", [7, 2 ** 22])
+def test_stream_matches_power_iteration(tmp_path, corpus, chunk):
+    graph = LinkGraph.from_corpus(corpus)
+    path = os.path.join(tmp_path, "edges")
+    write_edge_file(path, graph)
+    edges = EdgeFile(path)
+    assert len(edges) == len(graph)
+    assert edges.edges_count == graph.edges_count
+    assert np.array_equal(edges.out_degrees, graph.out_degrees)
+    assert edges.names([2, 0]) == [graph.names[2], graph.names[0]]
+
+    stats = {}
+    rank = stream_pagerank(edges, DAMPING, chunk=chunk, stats=stats)
+    assert np.abs(rank - power_iteration(graph, DAMPING)).sum() < 1e-12
+    assert distance(graph.ranks(rank), reference_ranks(corpus)) < 1e-7
+    assert stats["bytes"] == stats["iterations"] * graph.edges_count * 8
+
+
+def test_edge_file_without_links_or_names(tmp_path):
+    graph = LinkGraph.from_edges(3, [], [])
+    path = os.path.join(tmp_path, "edges")
+    write_edge_file(path, graph)
+    os.remove(path + ".names")
+    edges = EdgeFile(path)
+    assert edges.names([1]) == ["1"]
+    assert np.allclose(stream_pagerank(edges, DAMPING), 1 / 3)
+
+    with open(path, "r+b") as f:
+        f.write(b"X")
+    with pytest.raises(ValueError):
+        EdgeFile(path)
+
+
+@pytest.fixture(scope="module")
+def large_corpus():
+    corpus = random_corpus(2000)
+    return corpus, reference_ranks(corpus)
+
+
+@pytest.mark.parametrize("method", sorted(SOLVERS))
+def test_solvers_match_reference(corpus, method):
+    check_solver(corpus, reference_ranks(corpus), method)
+
+
+@pytest.mark.parametrize("method", sorted(SOLVERS))
+def test_solvers_match_reference_on_large_graph(large_corpus, method):
+    # Large enough for extrapolation and adaptive freezing to take effect
+    stats = check_solver(*large_corpus, method)
+    assert stats.get("extrapolations", 1) > 0
+    assert stats.get("updates", 0) < stats["iterations"] * len(large_corpus[0])
+
+
+def check_solver(corpus, reference, method):
+    stats = {}
+    graph = LinkGraph.from_corpus(corpus)
+    rank = SOLVERS[method](graph, DAMPING, stats=stats)
+    assert rank.sum() == pytest.approx(1)
+    assert distance(graph.ranks(rank), reference) < 1e-7
+    assert stats["residual"] < 1e-8
+    assert iterate_pagerank(corpus, DAMPING, method) == graph.ranks(rank)
+    return stats
+
+
+def test_pull_over_some_pages():
+    graph = LinkGraph.from_corpus(random_corpus(300))
+    values = np.random.default_rng(SEED).random((len(graph), 3))
+    pages = np.array([5, 0, 299, 17, 17])
+    assert np.allclose(graph.pull(values, pages), graph.pull(values)[pages])
+    assert graph.pull(values, pages[:0]).shape == (0, 3)
+    with pytest.raises(ValueError):
+        iterate_pagerank(random_corpus(10), DAMPING, "jacobi")
+
+
+@pytest.mark.parametrize("model", sorted(MODELS))
+def test_generated_graphs(tmp_path, model):
+    graph = MODELS[model](np.random.default_rng(SEED), 1000)
+    again = MODELS[model](np.random.default_rng(SEED), 1000)
+    assert np.array_equal(graph.sources, again.sources)
+    assert np.array_equal(graph.offsets, again.offsets)
+
+    sources, targets = graph.edges()
+    assert len(graph) == 1000
+    assert not (sources == targets).any()
+    assert 0.1 < (graph.out_degrees == 0).mean() < 0.3
+    if model == "attachment":
+        assert (targets < sources).all()
+
+    write_html(tmp_path, graph)
+    crawled = crawler.crawl_graph(tmp_path, workers=1)
+    assert crawled.names == [f"{name}.html" for name in sorted(graph.names)]
+    assert crawled.edges_count == graph.edges_count
+    corpus = crawl(tmp_path)
+    assert sum(map(len, corpus.values())) == graph.edges_count
+    reference = graph.ranks(power_iteration(graph, DAMPING))
+    ranks = iterate_pagerank(corpus, DAMPING)
+    assert distance(
+        ranks, {f"{name}.html": rank for name, rank in reference.items()}
+    ) < 1e-7
+
+
+def test_benchmark_tasks(tmp_path):
+    rng = np.random.default_rng(SEED)
+    graph = power_law_graph(rng, 1000)
+    rows = list(benchmark.benchmark_graph(graph, tmp_path, rng))
+    assert [row["task"] for row in rows] == list(benchmark.LIMITS)
+    for row in rows:
+        if row["task"].startswith("crawl"):
+            assert row["error"] is None
+        elif row["task"].startswith("sample"):
+            assert row["error"] < 0.1
+        else:
+            assert row["error"] < 1e-7
+
+
+def personalized_reference(corpus, seeds, damping=DAMPING):
+    """
+    Returns PageRank by page name, solved exactly when random jumps, and
+    pages without links, land evenly on the pages of `seeds`.
+    """
+    names = sorted(corpus)
+    n = len(names)
+    index = {name: i for i, name in enumerate(names)}
+    jump = np.array([name in seeds for name in names]) / len(seeds)
+    chain = np.zeros((n, n))
+    for page in names:
+        if corpus[page]:
+            chain[:, index[page]] = (1 - damping) * jump
+            for link in corpus[page]:
+                chain[index[link], index[page]] += damping / len(corpus[page])
+        else:
+            chain[:, index[page]] = jump
+    rank = np.linalg.solve(
+        np.eye(n) - chain + np.outer(jump, np.ones(n)), jump
+    )
+    return dict(zip(names, rank))
+
+
+def test_personalized_matches_reference(corpus):
+    rng = random.Random(SEED)
+    pages = sorted(corpus)
+    seed_sets = [set(pages), {pages[0]}] + [
+        set(rng.sample(pages, rng.randint(1, len(pages)))) for _ in range(6)
+    ]
+    results = personalized_pagerank(corpus, DAMPING, seed_sets)
+    assert distance(results[0], reference_ranks(corpus)) < 1e-7
+    for ranks, seeds in zip(results, seed_sets):
+        assert sum(ranks.values()) == pytest.approx(1)
+        assert distance(ranks, personalized_reference(corpus, seeds)) < 1e-7
+
+    # Solving the columns together gives each one's own solution
+    graph = LinkGraph.from_corpus(corpus)
+    teleport = graph.teleport(seed_sets)
+    together = personalized_iteration(graph, DAMPING, teleport)
+    for column in range(len(seed_sets)):
+        alone = personalized_iteration(
+            graph, DAMPING, teleport[:, column:column + 1]
+        )
+        assert np.abs(together[:, column] - alone[:, 0]).sum() < 1e-12
+
+    with pytest.raises(ValueError):
+        graph.teleport([set()])
+    with pytest.raises(ValueError):
+        personalized_iteration(graph, DAMPING, -teleport)